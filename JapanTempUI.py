@@ -3,24 +3,33 @@ This module contains is mainly UI off the application
 """
 
 import tkinter as tk
-from threading import Thread
 from tkinter import ttk
 from tkinter.messagebox import showerror, showwarning
-from typing import Callable
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple, Union
 
-import matplotlib
-import pandas as pd
 import ttkthemes
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from matplotlib.figure import Figure
 
-from backend import CityNotFoundError, JapanTemperature
+from lru import LRUCache
+from search import CitySearchIndex
+from startup import startup
+from tasks import TaskRunner
+from tracing import tracer
 
-matplotlib.use('TKAgg')
+# pandas, matplotlib and the backend take most of the startup time
+# so they are imported when they are first needed after the window is shown
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from backend import JapanTemperature
+
+# bytes of bitmap of the recently drawn views, one view of 1000 x 700 pixel is about 5.6 MB
+VIEW_CACHE_BYTES = 64 << 20
+# mark after the year that doesn't have every day in year combobox
+PARTIAL_MARK = ' (partial)'
 
 
 class ModeFrame(ttk.LabelFrame):
-    """A frame which have include radio button to switch mode whether be Overall, Year, and Month mode """
+    """A frame which have include radio button to switch mode whether be Overall, Year, Month, and Heatmap mode """
 
     def __init__(self, master: ttkthemes.ThemedTk) -> None:
         """Initialize a ModeFrame
@@ -41,6 +50,7 @@ class ModeFrame(ttk.LabelFrame):
         # variable
         self.mode_var = tk.StringVar()
         self.compare_var = tk.BooleanVar()
+        self.anomaly_var = tk.BooleanVar()
 
         # radio button
         self.over_mode = ttk.Radiobutton(
@@ -49,13 +59,19 @@ class ModeFrame(ttk.LabelFrame):
             self, text='Year', variable=self.mode_var, value='year', command=self.load_year)
         self.month_mode = ttk.Radiobutton(
             self, text='Month', variable=self.mode_var, value='month', command=self.load_month)
+        self.heatmap_mode = ttk.Radiobutton(
+            self, text='Heatmap', variable=self.mode_var, value='heatmap', command=self.load_heatmap)
         self.compare_mode = ttk.Checkbutton(
             self, text='Comparing?', variable=self.compare_var, command=self.put_describe)
+        self.anomaly_mode = ttk.Checkbutton(
+            self, text='Anomaly?', variable=self.anomaly_var)
 
         self.over_mode.grid(row=0, column=1, sticky=tk.W)
         self.year_mode.grid(row=0, column=2, sticky=tk.W)
         self.month_mode.grid(row=0, column=3, sticky=tk.W)
+        self.heatmap_mode.grid(row=0, column=4, sticky=tk.W)
         self.compare_mode.grid(row=1, column=0, sticky=tk.W)
+        self.anomaly_mode.grid(row=1, column=1, sticky=tk.W)
 
         # label
         self.mode_label = ttk.Label(self, text='Mode: ')
@@ -66,6 +82,8 @@ class ModeFrame(ttk.LabelFrame):
         self.mode_var.set('overall')
         self.compare_var.set(False)
         self.compare_var.trace('w', lambda *events: self.__master.clear())
+        self.anomaly_var.set(False)
+        self.anomaly_var.trace('w', lambda *events: self.__master.clear(clear_all=False))
 
         rows, cols = self.grid_size()
         for row in range(rows):
@@ -94,6 +112,13 @@ class ModeFrame(ttk.LabelFrame):
         self.clear()
         self.__master.plot_frame.month_mode()
 
+    def load_heatmap(self) -> None:
+        """
+        Load heatmap mode that show every city at once into UI
+        """
+        self.clear()
+        self.__master.plot_frame.heatmap_mode()
+
     def put_describe(self) -> None:
         """
         put describe text into UI
@@ -181,14 +206,13 @@ class DescribeFrame(ttk.LabelFrame):
         super().grid(row=3, column=2, columnspan=2, **
                      self.__master.LABELFRAME_OPT, **kwargs)
 
-    def change_describe(self, data: pd.core.series.Series) -> None:
+    def change_describe(self, described: 'pd.Series') -> None:
         """changge the value of describe in this widget
 
         Arguments:
-            data {pd.core.series.Serie} -- a series of descripion of data
-                                           including all quatile mean std
+            described {pd.core.series.Serie} -- a series of descripion of data
+                                                including all quatile mean std
         """
-        described = self.__master.database.get_describe(data)
         for data, var in zip(described, self.var_tup):
             var.set(round(data, 2))
 
@@ -207,6 +231,8 @@ class PlotFrame(ttk.LabelFrame):
     this frame is for choosecity, year, and month for plotting thing
     """
 
+    SEARCH_DELAY = 150  # millisecond after the last keystroke before searching
+
     def __init__(self, master: ttkthemes.ThemedTk) -> None:
         """Initialize the plotframe
 
@@ -215,6 +241,8 @@ class PlotFrame(ttk.LabelFrame):
         """
         super().__init__(master)
         self.__master = master
+        self.__search_index = None
+        self.__search_job = None
         self.grid(row=2, column=2, columnspan=2, **master.LABELFRAME_OPT)
         self.__initwidget()
 
@@ -259,7 +287,11 @@ class PlotFrame(ttk.LabelFrame):
         Combobox in initial state
         """
         self.city_combobox['values'] = list(self.__master.database.city)
-        self.year_combobox['values'] = list(self.__master.database.year)
+        self.__search_index = CitySearchIndex(self.__master.database.city)
+        # year that doesn't have every day is flagged so its short line and missing statistics aren't a surprise
+        partial = set(self.__master.database.partial_years)
+        self.year_combobox['values'] = [f'{year}{PARTIAL_MARK}' if year in partial else year
+                                        for year in self.__master.database.year]
         self.month_combobox['values'] = list(range(1, 13))
 
     def clear_combobox(self) -> None:
@@ -272,22 +304,24 @@ class PlotFrame(ttk.LabelFrame):
             cb.set('')
 
     def city_check_input(self, event: tk.Event) -> None:
-        """easier searching city for combobox
+        """easier searching city for combobox, burst of typing is searched once
 
         Arguments:
             event {tk.Event} -- event that call it every time that binded function was call
         """
-        # get the city
-        search_city = self.city_combobox.get()
-        all_city = self.__master.database.city
+        if self.__search_job is not None:
+            self.after_cancel(self.__search_job)
+        self.__search_job = self.after(self.SEARCH_DELAY, self.__search_city)
 
+    def __search_city(self) -> None:
+        """
+        filter value of city combobox by what user typed
+        """
+        self.__search_job = None
+        if self.__search_index is None:
+            self.__search_index = CitySearchIndex(self.__master.database.city)
         # if user didn't input anything value of combobox will be all city
-        if not search_city:
-            self.city_combobox['values'] = list(all_city)
-        else:
-            filtered_city = [
-                each_city for each_city in all_city if search_city.lower() in each_city.lower()]
-            self.city_combobox['values'] = filtered_city
+        self.city_combobox['values'] = self.__search_index.search(self.city_combobox.get())
 
     def have_grided(self, ttk_widget: ttk.Widget) -> bool:
         """check whether widget jusr have grided
@@ -300,10 +334,19 @@ class PlotFrame(ttk.LabelFrame):
         """
         return bool(ttk_widget.grid_info())
 
+    def __show_city(self) -> None:
+        """
+        put city combobox back after heatmap mode hid it
+        """
+        if not self.have_grided(self.city_combobox):
+            self.city_combobox.grid(row=0, column=1, **self.__master.GRID_OPT)
+            self.city_label.grid(row=0, column=0, **self.__master.GRID_OPT)
+
     def month_mode(self) -> None:
         """
         set city, year, and month combobox to month mode
         """
+        self.__show_city()
         if not self.have_grided(self.year_combobox):
             self.year_combobox.grid(
                 row=1, column=1, **self.__master.GRID_OPT)
@@ -320,6 +363,7 @@ class PlotFrame(ttk.LabelFrame):
         """
         set city and year combobox to year mode
         """
+        self.__show_city()
         if not self.have_grided(self.year_combobox):
             self.year_combobox.grid(row=1, column=1, **self.__master.GRID_OPT)
             self.__master.plot_frame.year_label.grid(
@@ -333,6 +377,7 @@ class PlotFrame(ttk.LabelFrame):
         """
         set city combobox into the frame as overall mode
         """
+        self.__show_city()
         for combobox in (self.year_combobox, self.month_combobox):
             if self.have_grided(combobox):  # if it was grided ungrided it
                 combobox.grid_forget()
@@ -341,12 +386,28 @@ class PlotFrame(ttk.LabelFrame):
             if self.have_grided(label):
                 label.grid_forget()
 
+    def heatmap_mode(self) -> None:
+        """
+        set only year combobox to heatmap mode, every city is shown
+        and empty year show the day of year climatology
+        """
+        self.year_mode()
+        self.city_combobox.grid_forget()
+        self.city_label.grid_forget()
 
-def runtask(text: str) -> Callable:
+
+def runtask(text: str, supersede: bool = False) -> Callable:
     """decorator for JapanTempReportUI class
 
     Arguments:
         text {str} -- text for appering in status bar when task in running
+
+    Keyword Arguments:
+        supersede {bool} -- calling it again cancel the previous call instead of
+                            disabling the widgets until it is done (default: {False})
+
+    function can return another function that is called on the Tk thread after it is done
+    so widgets, artists and canvas are never touched from the worker
     """
     def wrapper(func: Callable) -> Callable:
         """Its a decorate thing nothing else
@@ -356,13 +417,18 @@ def runtask(text: str) -> Callable:
         """
 
         def inner(self) -> None:
-            """create a thread from function and then make progress bar track progress of it"""
-            task = Thread(target=lambda: func(self))
+            """submit function to the worker and then make progress bar track progress of it"""
             self.bar.start()
             self.status_var.set(text)
-            self.change_state(self, 'disabled')
-            task.start()
-            self.after(5, lambda: self.check_finished(task))
+            if not supersede:
+                self.change_state(self, 'disabled')
+            self.running_tasks += 1
+
+            def traced() -> Optional[Callable[[], None]]:
+                """run the function as one traced user action"""
+                with tracer.span(func.__name__.strip('_')):
+                    return func(self)
+            self.tasks.submit(func.__name__, traced, supersede)
         return inner
     return wrapper
 
@@ -370,45 +436,131 @@ def runtask(text: str) -> Callable:
 class JapanTempReportUI(ttkthemes.ThemedTk):
     """This is the main frame of the UI"""
 
-    def __init__(self, database: JapanTemperature) -> None:
+    def __init__(self, database: Union['JapanTemperature', Callable[[], 'JapanTemperature']]) -> None:
         """Initialize the app
 
         Arguments:
-            database {JapanTemperature} -- model from the backend
+            database {Union[JapanTemperature, Callable[[], JapanTemperature]]} -- model from the backend
+                or function that create it, it is called in the reading task so the backend
+                is imported after the window is shown
         """
         super().__init__()
         # this is dependency injection (design pattern)
-        self.database = database
-        self.__have_plotted = []  # use for checking duplicated plot
+        self.database = None if callable(database) else database
+        self.__create_database = database if callable(database) else None
+        self.__startup_reported = False
+        self.__have_plotted = {}  # use for checking duplicated plot, label mapped to its line
+        self.__heatmap = None  # image of heatmap mode and its colorbar
+        self.__colorbar = None
+        # bitmap of recently drawn views so going back to one is only a blit,
+        # the data of the view come from the query cache of the model
+        self.__views = LRUCache(VIEW_CACHE_BYTES, sizeof=lambda view: view[2])
         self.style = ttkthemes.ThemedStyle(self)  # using the ttktheme
         self.style.theme_use('itft1')
         self.GRID_OPT = {'padx': 5, 'pady': 5, 'sticky': tk.EW}
         self.LABELFRAME_OPT = {'padx': 2, 'pady': 2, 'sticky': tk.NSEW}
+        # finished task wake the Tk loop up instead of polling every thread
+        self.tasks = TaskRunner(notify=self.__notify_finished)
+        self.running_tasks = 0
+        self.bind('<<TaskFinished>>', self.check_finished)
+        self.bind('<<ReadProgress>>', self.__show_progress)
         self.initcomponents()
 
     @runtask('Reading file')
-    def __readfile(self) -> None:
+    def __readfile(self) -> Callable[[], None]:
         """
         read the database from model
-        """
-        self.database._readfile()
-        self.plot_frame.init_combobox()
 
-    def check_finished(self, task: Thread) -> None:
-        """Check whether task is finished if finished it will stop the progressbar then config textlabel to Done
+        Returns:
+            Callable[[], None] -- fill the comboboxes on the Tk thread
+        """
+        self.__streamed = False
+        self.__read_rows = 0
+        if self.database is None:
+            with tracer.span('import'):
+                self.database = self.__create_database()
+        with tracer.span('read'):
+            self.database._readfile(streaming=True, progress=self.__read_progress)
+        startup.mark('data')
+
+        def done() -> None:
+            # views that were drawn while streaming show only the rows read so far
+            self.__views.clear()
+            self.plot_frame.init_combobox()
+        return done
+
+    def __read_progress(self, rows: int) -> None:
+        """tell the Tk loop how many rows have been read, called from the worker after every chunk of streaming read
 
         Arguments:
-            task {Thread} -- some task that are running from run_task decorator
+            rows {int} -- number of rows that have been parsed
         """
-        # check whether task is done or not if not it will check the task again after 5millisecond
-        # if task is finished, text will config to be Done then stop the progressbar
-        if task.is_alive():
-            self.after(5, lambda: self.check_finished(task))
-        else:
+        self.__read_rows = rows
+        try:
+            self.event_generate('<<ReadProgress>>', when='tail')
+        except (tk.TclError, RuntimeError):
+            # window was already destroyed
+            pass
+
+    def __show_progress(self, event: tk.Event = None) -> None:
+        """show how many rows have been read in status bar
+
+        Keyword Arguments:
+            event {tk.Event} -- <<ReadProgress>> event that sent by worker (default: {None})
+        """
+        self.status_var.set(f'Reading file... {self.__read_rows:,} rows')
+        self.__views.clear()
+        # city and early rows can be plotted while the rest is reading
+        if not self.__streamed:
+            self.__streamed = True
+            self.plot_frame.init_combobox()
+            self.change_state(self, 'normal')
+
+    def __notify_finished(self) -> None:
+        """
+        tell the Tk loop that some task is finished, it is called from worker thread
+        """
+        try:
+            self.event_generate('<<TaskFinished>>', when='tail')
+        except (tk.TclError, RuntimeError):
+            # window was already destroyed
+            pass
+
+    def check_finished(self, event: tk.Event = None) -> None:
+        """Drain the finished tasks if every task is finished it will stop the progressbar then config textlabel to Done
+
+        Keyword Arguments:
+            event {tk.Event} -- <<TaskFinished>> event that sent by worker (default: {None})
+        """
+        for task, future in self.tasks.drain():
+            self.running_tasks -= 1
+            if future.cancelled():
+                continue
+            error = future.exception()
+            # result of the task that was superseded or cleared while it was running is dropped
+            if error is None and callable(future.result()) and not task.cancelled:
+                try:
+                    # render continue the action that the task started on the worker
+                    with tracer.span('render', task=task.name.strip('_')):
+                        future.result()()
+                except Exception as exception:
+                    error = exception
+            if error is not None:
+                self.report_callback_exception(type(error), error, error.__traceback__)
+        # if every task is finished, text will config to be Done then stop the progressbar
+        if self.running_tasks == 0:
             self.bar.stop()
-            self.status_var.set('Done')
             self.change_state(self, 'normal')
-            self.after(1000, lambda: self.status_var.set(''))
+            if startup.enabled and 'data' in startup and not self.__startup_reported:
+                self.__startup_reported = True
+                print(startup.report())
+                self.status_var.set(startup.report())
+            elif tracer.enabled:
+                # debug overlay, time of every stage of the last action stay in status bar
+                self.status_var.set(tracer.summary())
+            else:
+                self.status_var.set('Done')
+                self.after(1000, lambda: self.status_var.set(''))
 
     def initcomponents(self) -> None:
         """
@@ -421,9 +573,6 @@ class JapanTempReportUI(ttkthemes.ThemedTk):
         self.describe_frame = DescribeFrame(self)
         self.plot_frame = PlotFrame(self)
         self.create_button()
-        self.__readfile()
-
-        self.create_canvas()
         self.create_label()
         self.configuration()
 
@@ -440,12 +589,24 @@ class JapanTempReportUI(ttkthemes.ThemedTk):
         """
         Create a Figure and axe for plotting the data
         """
+        import matplotlib
+        matplotlib.use('TKAgg')
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+
+        from plotter import BlitManager, LevelOfDetail
 
         self.plot = FigureCanvasTkAgg(Figure(), self)
         self.ax = self.plot.figure.add_subplot()
+        self.lod = LevelOfDetail(self.ax)
+        self.blit = BlitManager(self.plot)
+        self.plot.mpl_connect('resize_event', self.lod.refresh)
+        # bitmaps of the old size can't be shown again
+        self.plot.mpl_connect('resize_event', lambda event: self.__views.clear())
 
         self.plot.get_tk_widget().grid(row=1, column=0, rowspan=3,
                                        padx=5, pady=5, sticky=tk.NSEW)
+        self.configuration()
 
     def create_button(self) -> None:
         """Create button"""
@@ -483,67 +644,145 @@ class JapanTempReportUI(ttkthemes.ThemedTk):
         showwarning(title='Please select all the box',
                     message='Please enter all the information before plotting')
 
-    @runtask('Plotting...')
-    def plotting(self) -> None:
-        """PLot the graph"""
+    @runtask('Plotting...', supersede=True)
+    def plotting(self) -> Optional[Callable[[], None]]:
+        """query the data of the plot in worker
+
+        Returns:
+            Optional[Callable[[], None]] -- function that draw the data on the Tk thread,
+                                            None if a newer plot was requested
+        """
+        from backend import CityNotFoundError
+        from plotter import (HEATMAP, plot_label, plot_title, query,
+                             query_heatmap, query_many)
 
         # I think this method can be more optimized but dateline make me TT
         # did it a redundant I've fix plotting bug for week an a half please gimme lots of score pls🥺
-        if not self.mode_frame.compare_var.get():
-            self.clear(clear_all=False)
-
-        mode_list = ['overall', 'year', 'month']
+        compare = self.mode_frame.compare_var.get()
         mode = self.mode_frame.mode_var.get()
-        mode_ind = mode_list.index(mode)
+        # temperature minus the day of year climatology of the city
+        anomaly = self.mode_frame.anomaly_var.get()
         # get the value of variable
         city = self.city_var.get().capitalize()
-        year = self.year_var.get()
+        year = self.year_var.get().replace(PARTIAL_MARK, '')
         month = self.month_var.get()
-        title = f'{city} Temperature'
+        if mode == HEATMAP and not year:
+            # climatology of empty year is the temperature itself, it has no anomaly scale or label
+            anomaly = False
         try:
-            if mode_ind >= 1:
-                title += f' at {year}'
-            if mode_ind >= 2:
-                title += f' between {month}'
-
-            if mode_ind == 0:
-                title = 'Japanese Temperature over time (Comparing Mode)'
-                data = self.database.overall_mode(city)
-                label = f'{city} Overall Temperature'
-                if label in self.__have_plotted:
-                    return
-                self.__have_plotted.append(label)
-                data.plot(ylabel='Temperature', title=title, grid=True,
-                          ax=self.ax, label=label)
+            title = plot_title(mode, city, year, month, anomaly=anomaly)
+            if mode == HEATMAP:
+                # every city is one row of a single image
+                data = query_heatmap(self.database, year, anomaly)
+                return None if self.tasks.cancelled() else lambda: self.__draw_heatmap(title, anomaly, data)
+            if compare and (',' in city or city.strip() == '*'):
+                # many city separated by comma (or * for every city) are queried in one slice
+                cities = None if city.strip() == '*' else [
+                    each.strip().capitalize() for each in city.split(',') if each.strip()]
+                data, _ = query_many(self.database, mode, cities, year, month, anomaly)
+                series = {plot_label(mode, each, year, month, anomaly): data[each] for each in data.columns}
+                described = None
             else:
-                if mode_ind == 1:
-                    title = 'Japanese Temperature over year (Comparing Mode)'
-                    data = self.database.year_mode(city, int(year))
-                else:
-                    title = 'Japanese Temperature over month in days (Comparing Mode)'
-                    data = self.database.month_mode(city, int(year), month)
-                dataplot = data.tolist()
-                label = f'{city} {year} {month} Temperature'
-                if label in self.__have_plotted:
-                    return
-                self.__have_plotted.append(label)
-                self.ax.plot(list(range(1, len(dataplot)+1)),
-                             dataplot, label=label)
-                self.ax.set_title(title)
-                self.ax.set_xlabel('day')
-                self.ax.set_ylabel('Temperature (℃)')
-                self.ax.grid(True)
-
-            self.ax.legend(loc='best')  # set legend for axes
-            self.describe_frame.change_describe(data)  # set describe for axes
-
-            self.plot.draw()
+                data, described = query(self.database, mode, city, year, month, anomaly)
+                series = {plot_label(mode, city, year, month, anomaly): data}
         # if city not found it will show error on a popup message
         except CityNotFoundError as message:
-            self.show_error(message)
+            return lambda error=str(message): self.show_error(error)
         # if user not fill all the bar it will show warning message
         except (ValueError, KeyError):
-            self.show_warning()
+            return self.show_warning
+        # newer plot was requested while reading the data so this one is dropped
+        if self.tasks.cancelled():
+            return None
+        return lambda: self.__draw_lines(mode, compare, anomaly, title, series, described)
+
+    def __draw_heatmap(self, title: str, anomaly: bool, data: 'pd.DataFrame') -> None:
+        """draw the city x day image of heatmap mode, it is called on the Tk thread
+
+        Arguments:
+            title {str} -- title of the axes
+            anomaly {bool} -- whether data is the anomaly
+            data {pd.DataFrame} -- city x day matrix
+        """
+        from plotter import HEATMAP, draw_heatmap
+
+        key = (HEATMAP, anomaly, title, self.plot.get_width_height(physical=True))
+        view = self.__views.get(key)
+        with tracer.span('artists', mode=HEATMAP, cities=len(data)):
+            self.__heatmap = draw_heatmap(self.ax, data, title, self.__heatmap, anomaly)
+            if self.__colorbar is None:
+                self.__colorbar = self.plot.figure.colorbar(self.__heatmap, ax=self.ax)
+            # selecting or emptying the year switch between anomaly and temperature without clearing
+            self.__colorbar.set_label('Temperature Anomaly (℃)' if anomaly else 'Temperature (℃)')
+        with tracer.span('draw', full=True, cached=view is not None):
+            self.__show(key, view)
+
+    def __draw_lines(self, mode: str, compare: bool, anomaly: bool, title: str,
+                     series: Dict[str, 'pd.Series'], described: Optional['pd.Series']) -> None:
+        """draw the lines that weren't plotted yet, it is called on the Tk thread
+
+        Arguments:
+            mode {str} -- mode of the plot
+            compare {bool} -- whether lines are added to the plotted ones
+            anomaly {bool} -- whether data is the anomaly
+            title {str} -- title of the axes
+            series {Dict[str, pd.Series]} -- label mapped to its data
+            described {Optional[pd.Series]} -- description that is shown with the plot
+        """
+        from plotter import draw_series
+
+        series = {label: each for label, each in series.items() if label not in self.__have_plotted}
+        if not series:
+            return
+        # the view is every plotted line in the order that they were plotted (their color)
+        plotted = tuple(self.__have_plotted) if compare else ()
+        key = (mode, compare, anomaly, title, plotted + tuple(series),
+               self.plot.get_width_height(physical=True))
+        view = self.__views.get(key)
+
+        # not comparing mode reuse the line that already plotted instead of clearing axes
+        line = None
+        if not compare and self.__have_plotted:
+            _, line = self.__have_plotted.popitem()
+            self.__have_plotted.clear()
+        limits = (self.ax.get_xlim(), self.ax.get_ylim(), self.ax.get_title())
+
+        with tracer.span('artists', mode=mode, lines=len(series)):
+            for label, each in series.items():
+                line = draw_series(self.ax, self.lod, mode, each, label, title, line)
+                self.__have_plotted[label] = line
+                self.blit.add(line)
+                line = None
+            if anomaly:
+                self.ax.set_ylabel('Temperature Anomaly (℃)')
+            self.ax.relim()
+            self.ax.autoscale_view()
+
+            self.blit.set_legend(self.ax.legend(loc='best'))  # set legend for axes
+        if described is not None:
+            self.describe_frame.change_describe(described)  # set describe for axes
+
+        # only the lines and legend are repainted if axes didn't move
+        full = limits != (self.ax.get_xlim(), self.ax.get_ylim(), self.ax.get_title())
+        with tracer.span('draw', full=full, cached=view is not None):
+            self.__show(key, view, full)
+
+    def __show(self, key: Tuple, view: Optional[Tuple], full: bool = True) -> None:
+        """blit the bitmap of the view that was drawn before or draw the figure then keep its bitmap,
+        artists are already updated with the data of the view so only the pixels are put back
+
+        Arguments:
+            key {Tuple} -- plot state of the view, mode, flags, plotted labels and canvas size
+            view {Optional[Tuple]} -- cached view or None if it has to be drawn
+
+        Keyword Arguments:
+            full {bool} -- whether the whole figure has to be drawn (default: {True})
+        """
+        if view is not None:
+            self.blit.restore(view[0], view[1])
+            return
+        self.blit.update(full=full)
+        self.__views.put(key, self.blit.snapshot())
 
     def change_state(self, parent: ttkthemes.ThemedTk, state: str) -> None:
         """configure allmthe button, combobox state to disabled
@@ -578,7 +817,15 @@ class JapanTempReportUI(ttkthemes.ThemedTk):
             clear_all {bool} -- if clear all is True It will clear all component else it will not clear the combobox (default: {True})
         """
 
+        # plot that is still querying would draw into the cleared axes
+        self.tasks.cancel('plotting')
+        if self.__colorbar is not None:
+            self.__colorbar.remove()
+            self.__colorbar = None
+        self.__heatmap = None
         self.ax.clear()  # clear the axe
+        self.lod.clear()
+        self.blit.clear()
         # reset the legend of plotted item
         self.plot.figure.legend_items = []
         self.__have_plotted.clear()
@@ -588,8 +835,21 @@ class JapanTempReportUI(ttkthemes.ThemedTk):
             self.plot_frame.clear_combobox()
         self.plot.draw()  # update canvas
 
+    def destroy(self) -> None:
+        """
+        stop the workers then destroy the window
+        """
+        self.tasks.shutdown()
+        tracer.export()
+        super().destroy()
+
     def run(self) -> None:
         """
-        Run the UI
+        Show the window first then read the data and create the canvas and run the UI
         """
+        self.update()
+        startup.mark('window')
+        self.__readfile()
+        self.create_canvas()
+        startup.mark('canvas')
         self.mainloop()
@@ -0,0 +1,143 @@
+"""
+This module contains the precomputed describe statistics of every city, year and month
+and the day of year climatology of every city.
+"""
+
+import warnings
+from typing import Dict, Tuple
+
+import numpy as np
+
+# same order as pd.Series.describe() without count
+STATISTICS = ('mean', 'std', 'min', '25%', '50%', '75%', 'max')
+# mean and percentile bands of the day of year climatology
+CLIMATE_BANDS = ('mean', '10%', '25%', '50%', '75%', '90%')
+YEAR_DAYS = 366
+# position of the first day of every month in 366 days year
+_MONTH_START = np.cumsum([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30])
+
+
+def describe_segments(matrix: np.ndarray, segments: Dict[int, Tuple[int, int]]) -> np.ndarray:
+    """compute describe statistics of every segment of rows for every city at once
+
+    Arguments:
+        matrix {np.ndarray} -- day x city matrix of temperature
+        segments {Dict[int, Tuple[int, int]]} -- (start, stop) row offset of each segment
+
+    Returns:
+        np.ndarray -- segment x city x statistic array in the order of segments and STATISTICS
+    """
+    bounds = np.array(list(segments.values()), dtype=np.int64).reshape(-1, 2)
+    if len(bounds) == 0:
+        return np.empty((0, matrix.shape[1], len(STATISTICS)))
+    block, count = _gather(matrix, bounds[:, 0], bounds[:, 1])
+
+    cube = np.empty((len(bounds), matrix.shape[1], len(STATISTICS)))
+    with warnings.catch_warnings():
+        # segment of one day (partial last year) has no std, it is NaN like pandas
+        warnings.simplefilter('ignore', RuntimeWarning)
+        cube[..., 0] = np.nanmean(block, axis=1)
+        cube[..., 1] = np.nanstd(block, axis=1, ddof=1)
+    for i, quantile in enumerate((0, 0.25, 0.5, 0.75, 1), start=2):
+        cube[..., i] = _quantile(block, count, quantile)
+    return cube
+
+
+def day_of_year(months: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """get position of every date in 366 days year so the same date of every year share one position
+    (1st March is always 60 whether the year has 29th February or not)
+
+    Arguments:
+        months {np.ndarray} -- month of every date
+        days {np.ndarray} -- day of month of every date
+
+    Returns:
+        np.ndarray -- position between 0 and 365 of every date
+    """
+    return (_MONTH_START[np.asarray(months) - 1] + np.asarray(days) - 1).astype(np.int16)
+
+
+def climatology(matrix: np.ndarray, days: np.ndarray) -> np.ndarray:
+    """compute mean and percentile bands of every day of year over every year for every city at once
+
+    Arguments:
+        matrix {np.ndarray} -- day x city matrix of temperature
+        days {np.ndarray} -- position in 366 days year of every row from day_of_year()
+
+    Returns:
+        np.ndarray -- float32 city x 366 x band array in the order of CLIMATE_BANDS,
+                      NaN for the day that never appear in data
+    """
+    climate = np.full((matrix.shape[1], YEAR_DAYS, len(CLIMATE_BANDS)), np.nan, dtype=np.float32)
+    if len(days) == 0:
+        return climate
+    # group the rows of each day of year together then reduce every group at once
+    order = np.argsort(days, kind='stable')
+    keys = days[order]
+    change = np.flatnonzero(np.diff(keys)) + 1
+    starts = np.concatenate(([0], change))
+    stops = np.concatenate((change, [len(keys)]))
+    block, count = _gather(matrix[order], starts, stops)
+
+    bands = np.empty((len(starts), matrix.shape[1], len(CLIMATE_BANDS)))
+    bands[..., 0] = np.nanmean(block, axis=1)
+    for i, quantile in enumerate((0.1, 0.25, 0.5, 0.75, 0.9), start=1):
+        bands[..., i] = _quantile(block, count, quantile)
+    climate[:, keys[starts]] = np.swapaxes(bands, 0, 1)
+    return climate
+
+
+def _gather(matrix: np.ndarray, starts: np.ndarray, stops: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """pad every segment to the longest one with NaN so they can be reduced together
+
+    Arguments:
+        matrix {np.ndarray} -- day x city matrix of temperature
+        starts {np.ndarray} -- start row offset of each segment
+        stops {np.ndarray} -- stop row offset of each segment
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray] -- segment x row x city block sorted along rows (NaN at the end)
+                                         and number of value that isn't NaN of each segment and city
+    """
+    width = int((stops - starts).max())
+    rows = starts[:, None] + np.arange(width)
+    padding = rows >= stops[:, None]
+    block = matrix[np.minimum(rows, len(matrix) - 1)].astype(np.float64)
+    block[padding] = np.nan
+    count = np.count_nonzero(~np.isnan(block), axis=1)
+    # np.nanpercentile fall back to a python loop over every segment and city
+    # so quantiles are interpolated from the sorted block instead (NaN is sorted to the end)
+    block.sort(axis=1)
+    return block, count
+
+
+def _quantile(block: np.ndarray, count: np.ndarray, quantile: float) -> np.ndarray:
+    """linearly interpolate the quantile of every segment and city from the sorted block
+
+    Arguments:
+        block {np.ndarray} -- sorted block from _gather()
+        count {np.ndarray} -- number of value that isn't NaN of each segment and city
+        quantile {float} -- quantile between 0 and 1
+
+    Returns:
+        np.ndarray -- segment x city array of the quantile
+    """
+    width = block.shape[1]
+    rank = quantile * (count - 1)
+    lower = np.clip(np.floor(rank).astype(np.int64), 0, width - 1)
+    upper = np.clip(np.ceil(rank).astype(np.int64), 0, width - 1)
+    low = np.take_along_axis(block, lower[:, None, :], axis=1)[:, 0]
+    high = np.take_along_axis(block, upper[:, None, :], axis=1)[:, 0]
+    return low + (high - low) * (rank - lower)
+
+
+def position(segments: Dict[int, Tuple[int, int]]) -> Dict[int, int]:
+    """map the key of each segment to its position in the array from describe_segments
+
+    Arguments:
+        segments {Dict[int, Tuple[int, int]]} -- (start, stop) row offset of each segment
+
+    Returns:
+        Dict[int, int] -- key mapped to position
+    """
+    return {key: i for i, key in enumerate(segments)}
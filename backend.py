@@ -3,11 +3,50 @@ This module contains the backend of the application.
 """
 
 
-from typing import List
+import calendar
+import csv
+import functools
+import io
+import mmap
+import os
+import threading
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+from aggregates import (CLIMATE_BANDS, STATISTICS, YEAR_DAYS, climatology,
+                        day_of_year, describe_segments, position)
+from datacache import (CACHE_DIR, cache_path, content_hash, fetch, fetch_tail,
+                       is_url, open_cache, open_source, read_cache,
+                       remote_validator, spool, write_cache)
+from lru import LRUCache
+from rangequery import RangeQueryIndex
+from store import (COPY_BYTES, decode_tenths, encode_tenths, extend_store,
+                   open_store, read_cube, remove_store, store_prefix,
+                   write_chunks, write_cube, write_store)
+
 FILEPATH = 'https://cloudbox.ku.ac.th/index.php/s/HKQzGzAJdMkZgYj/download'
+DATE_FORMAT = '%Y-%m-%d'
+CHUNK_SIZE = 2000
+# bytes of memory that one value take while its chunk is parsed (text, float64 frame and float32 rows)
+PARSE_BYTES = 64
+# bytes of memory that one value of a block take while its statistics are computed
+WORK_BYTES = 32
+
+
+def _synchronized(method: Callable) -> Callable:
+    """decorator for JapanTemperature, run the method while holding the lock of the model
+    so a query never see the data and the axes of two different publish
+
+    Arguments:
+        method {Callable} -- method of the model
+    """
+    @functools.wraps(method)
+    def inner(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return inner
 
 
 class JapanTemperature:
@@ -15,41 +54,654 @@ class JapanTemperature:
     JapanTemp Model class for UI
     """
 
-    def __init__(self) -> None:
+    STORAGES = ('pandas', 'memmap', 'lazy')
+    DTYPES = ('float64', 'float32', 'int16')
+
+    def __init__(self, storage: str = 'pandas', max_cities: int = 16, max_queries: int = 256,
+                 memory_budget: Optional[int] = None, dtype: str = 'float64') -> None:
         """
         Initialize the temp and city attribute
         it will be change into pandas dataframe and Series after reading a file
+
+        Keyword Arguments:
+            storage {str} -- 'pandas' keep a float64 DataFrame in memory,
+                             'memmap' keep a float32 city x day matrix mapped from disk
+                             that shared between processes,
+                             'lazy' read only city and date at first then read each city
+                             from the on-disk cache when it is needed (default: {'pandas'})
+            max_cities {int} -- number of city kept in memory in lazy storage (default: {16})
+            max_queries {int} -- number of overall, year, month and describe result
+                                 kept in the query cache (default: {256})
+            memory_budget {Optional[int]} -- bytes of memory that reading may use in memmap storage,
+                                             the csv file is cleaned chunk by chunk into the store and
+                                             the statistics are computed block by block from it so data
+                                             larger than memory can be read, None to read it at once (default: {None})
+            dtype {str} -- how pandas storage keep the temperature, 'float64' as it is parsed,
+                           'float32' in half of the memory, 'int16' as tenths of a degree in quarter
+                           of the memory that is decoded into float64 when a city is read (default: {'float64'})
+
+        Raises:
+            ValueError: Raises if storage or dtype is unknown, memory_budget is given without memmap storage
+                        or compact dtype is given without pandas storage
         """
+        if storage not in self.STORAGES:
+            raise ValueError(f'storage must be one of {self.STORAGES}')
+        if memory_budget is not None and (storage != 'memmap' or memory_budget <= 0):
+            raise ValueError('memory_budget must be positive and needs memmap storage')
+        if dtype not in self.DTYPES:
+            raise ValueError(f'dtype must be one of {self.DTYPES}')
+        if dtype != 'float64' and storage != 'pandas':
+            # memmap storage is always float32 and lazy storage keep only few cities
+            raise ValueError(f'{dtype} dtype needs pandas storage')
+        self.__storage = storage
+        self.__budget = memory_budget
+        self.__dtype = dtype
+        # data is published by the reading thread while UI or server threads query it
+        self._lock = threading.RLock()
+        # whether the published data is int16 tenths, data that is still streaming is float64
+        self.__tenths = False
+        # fingerprint of the source that was read last
+        self.__fingerprint = None
+        # prefix of the memory-mapped store that was read and of the version that append wrote
+        self.__prefix = None
+        self.__version = None
+        self.__lazy = None
+        self.__columns = LRUCache(max_cities)
+        self.__cubes = LRUCache(max_cities)
+        self.__ranges = LRUCache(max_cities)
+        self.__cube = None
+        # city whose overall statistics have to be recomputed after append, None if there is none
+        self.__stale = None
+        # rows appended after the lazy storage was opened
+        self.__tail = None
+        # source mapped to (bytes that were read, csv header) so append read only the new bytes
+        self.__sources = {}
+        self.__queries = LRUCache(max_queries)
         self.__temp = []
         self.__city = []
+        self.__index = pd.DatetimeIndex([], name='Date')
+        # datetime64[D] copy of the date axis, it is built on first use of date
+        self.__date = None
+        self.__year = range(0)
+        self.__year_offsets = {}
+        self.__month_offsets = {}
+        self.__day_of_year = np.array([], dtype=np.int16)
+        self.__year_position = {}
+        self.__month_position = {}
 
-    def _readfile(self) -> None:
+    def _readfile(self, filepath: str = FILEPATH, cache_dir: Optional[str] = CACHE_DIR,
+                  streaming: bool = False, progress: Optional[Callable[[int], None]] = None,
+                  fingerprint: Optional[str] = None) -> None:
         """
         Read a file then set a instance
         it will be called in UI
+
+        Keyword Arguments:
+            filepath {str} -- url or local path of the csv file (default: {FILEPATH})
+            cache_dir {Optional[str]} -- directory of the on-disk cache, None to disable it (default: {CACHE_DIR})
+            streaming {bool} -- parse the csv file chunk by chunk and make the rows that
+                                already parsed queryable before the whole file is done (default: {False})
+            progress {Optional[Callable[[int], None]]} -- called with number of parsed rows
+                                                          after every chunk in streaming mode
+                                                          or in memory budget (default: {None})
+            fingerprint {Optional[str]} -- fingerprint of the source that another model already read
+                                           eg. in the parent of worker processes, the cache or store
+                                           is opened without downloading or hashing the source (default: {None})
+        """
+        if self.__storage != 'pandas' and cache_dir is None:
+            raise ValueError(f'{self.__storage} storage needs cache_dir')
+        raw = None
+        local = filepath
+        # ETag is enough to know that remote file didn't change, no download needed
+        if fingerprint is None and is_url(filepath):
+            fingerprint = remote_validator(filepath)
+        self.__sources.pop(filepath, None)
+        if fingerprint is None and self.__budget is not None:
+            # file is hashed block by block instead of being read into memory
+            local, fingerprint = spool(filepath, cache_dir)
+            with open(local, 'rb') as stream:
+                self.__sources[filepath] = (os.fstat(stream.fileno()).st_size, self.__header(stream.readline()))
+        elif fingerprint is None:
+            raw = fetch(filepath)
+            fingerprint = content_hash(raw)
+            header = raw[:raw.find(b'\n') + 1]
+            self.__sources[filepath] = (len(raw), self.__header(header))
+        self.__fingerprint = fingerprint
+
+        if self.__storage == 'lazy':
+            path = cache_path(filepath, cache_dir)
+            npz = open_cache(path, fingerprint)
+            if npz is None:
+                # first run has to build the cache, later run only read the header
+                temp = self.__load(filepath, cache_dir, fingerprint,
+                                   raw, streaming, progress)
+                npz = open_cache(path, fingerprint)
+                if npz is None:
+                    # cache couldn't be written so keep every city in memory
+                    self.__publish(temp)
+                    return
+            self.__publish_lazy(npz)
+            return
+        if self.__storage == 'memmap':
+            prefix = store_prefix(cache_path(filepath, cache_dir), fingerprint)
+            try:
+                temp = open_store(prefix)
+                if temp is None and self.__budget is not None:
+                    temp = self.__load_chunked(local, prefix, progress)
+                elif temp is None:
+                    temp = write_store(prefix, self.__load(
+                        filepath, cache_dir, fingerprint, raw, streaming, progress))
+            finally:
+                if local != filepath:
+                    os.remove(local)
+            # statistics are kept beside the store so they are computed once for every version of data
+            cube = read_cube(prefix)
+            if cube is not None and cube['overall'].shape[1] != len(temp.columns):
+                cube = None
+            self.__publish(temp, cube=cube)
+            self.__prefix = prefix
+            if cube is None:
+                write_cube(prefix, self.__cube)
+            return
+        temp = self.__load(filepath, cache_dir,
+                           fingerprint, raw, streaming, progress)
+        self.__publish(temp)
+
+    @_synchronized
+    def __publish(self, temp: pd.DataFrame, complete: bool = True,
+                  cube: Optional[Dict[str, np.ndarray]] = None) -> None:
+        """assign the data and rebuild everything that derived from it
+
+        Arguments:
+            temp {pd.DataFrame} -- cleaned DataFrame (or partially read one in streaming mode)
+
+        Keyword Arguments:
+            complete {bool} -- whether temp is the whole data, describe statistics
+                               are precomputed only when it is (default: {True})
+            cube {Optional[Dict[str, np.ndarray]]} -- statistics that were already computed
+                                                      from the same data, None to compute them (default: {None})
+        """
+        self.__close_lazy()
+        self.__drop_version()
+        # assign attribute, rows that are still streaming are compacted once they are complete
+        self.__temp = self.__compact(temp) if complete else temp
+        self.__tenths = complete and self.__dtype == 'int16'
+        self.__city = temp.columns
+        self.__build_axes(temp.index)
+        self.__queries.clear()
+        self.__ranges.clear()
+        self.__stale = None
+        if cube is None and complete:
+            # in memory budget the store is reduced block by block instead of as one float64 copy
+            cube = (self.__build_cube(self.__values()) if self.__budget is None
+                    else self.__build_cube_chunked(temp.to_numpy().T))
+        self.__cube = cube
+
+    def __compact(self, temp: pd.DataFrame) -> pd.DataFrame:
+        """convert the cleaned temperature into the dtype of the model as one day x city block
+
+        Arguments:
+            temp {pd.DataFrame} -- cleaned DataFrame
+
+        Returns:
+            pd.DataFrame -- DataFrame of float64, float32 or int16 tenths
+        """
+        if self.__storage == 'memmap':
+            # store is already one float32 block
+            return temp
+        if self.__dtype == 'int16':
+            values = encode_tenths(temp.to_numpy())
+        else:
+            # frame read from csv or cache has a block for every city, as one block
+            # to_numpy() of every query and of memory_usage is a view instead of a copy of every city
+            values = temp.to_numpy(dtype=self.__dtype)
+        return pd.DataFrame(values, index=temp.index, columns=temp.columns, copy=False)
+
+    def __values(self, rows: slice = slice(None), columns=slice(None)) -> np.ndarray:
+        """get day x city temperature of the rows and columns, int16 tenths are decoded
+
+        Keyword Arguments:
+            rows {slice} -- rows to be taken (default: {slice(None)})
+            columns {slice or List[int]} -- position of the cities to be taken (default: {slice(None)})
+
+        Returns:
+            np.ndarray -- temperature matrix, a view if nothing has to be decoded or gathered
         """
+        values = self.__temp.to_numpy()[rows]
+        if not isinstance(columns, slice) or columns != slice(None):
+            values = values[:, columns]
+        return decode_tenths(values) if self.__tenths else values
 
+    def __drop_version(self) -> None:
+        """
+        remove the version of the store that was written by append, it belong only to this model
+        """
+        if self.__version is not None:
+            remove_store(self.__version)
+            self.__version = None
+
+    def __close_lazy(self) -> None:
+        """
+        close the cache of lazy storage and forget every city that was read from it
+        """
+        if self.__lazy is not None:
+            self.__lazy.close()
+            self.__lazy = None
+        self.__tail = None
+        self.__columns.clear()
+        self.__cubes.clear()
+
+    @_synchronized
+    def __publish_lazy(self, npz: np.lib.npyio.NpzFile) -> None:
+        """assign only city and date then leave every city in cache until it is needed
+
+        Arguments:
+            npz {np.lib.npyio.NpzFile} -- opened cache
+        """
+        self.__close_lazy()
+        self.__cube = None
+        self.__stale = None
+        self.__queries.clear()
+        self.__ranges.clear()
+        self.__lazy = npz
+        self.__temp = None
+        self.__tenths = False
+        self.__city = pd.Index(npz['cities'].tolist())
+        self.__build_axes(pd.DatetimeIndex(npz['dates'], name='Date'))
+
+    def __load(self, filepath: str, cache_dir: Optional[str], fingerprint: str, raw: Optional[bytes],
+               streaming: bool = False, progress: Optional[Callable[[int], None]] = None) -> pd.DataFrame:
+        """get the cleaned DataFrame from cache or parse it from csv file
+
+        Arguments:
+            filepath {str} -- url or local path of the csv file
+            cache_dir {Optional[str]} -- directory of the on-disk cache or None
+            fingerprint {str} -- fingerprint of the source
+            raw {Optional[bytes]} -- content of the file if it was already downloaded
+
+        Keyword Arguments:
+            streaming {bool} -- parse the csv file chunk by chunk (default: {False})
+            progress {Optional[Callable[[int], None]]} -- progress callback of streaming mode (default: {None})
+
+        Returns:
+            pd.DataFrame -- cleaned DataFrame
+        """
+        temp = None
+        if cache_dir is not None:
+            temp = read_cache(cache_path(filepath, cache_dir), fingerprint)
+        if temp is None:
+            if streaming:
+                with (io.BytesIO(raw) if raw is not None else open_source(filepath)) as stream:
+                    temp = self.__stream(stream, progress)
+            else:
+                if raw is None:
+                    raw = fetch(filepath)
+                temp = self.__clean(pd.read_csv(io.BytesIO(raw)))
+            if cache_dir is not None:
+                write_cache(cache_path(filepath, cache_dir), temp, fingerprint)
+        return temp
+
+    @staticmethod
+    def __clean(temp: pd.DataFrame) -> pd.DataFrame:
+        """clean the raw DataFrame that read from csv file
+
+        Arguments:
+            temp {pd.DataFrame} -- raw DataFrame
+
+        Returns:
+            pd.DataFrame -- DataFrame indexed by date with only complete city
+        """
         # configuration for data
-        temp = pd.read_csv(FILEPATH)
         # set Date column to date type
         temp['Date'] = pd.to_datetime(temp['Date'])
         temp.set_index('Date', inplace=True)
+        return JapanTemperature.__tidy(temp)
+
+    @staticmethod
+    def __tidy(temp: pd.DataFrame) -> pd.DataFrame:
+        """sort the DataFrame and drop the city that has missing value
+        the incomplete last year is kept and listed in partial_years
+
+        Arguments:
+            temp {pd.DataFrame} -- DataFrame indexed by date
+
+        Returns:
+            pd.DataFrame -- DataFrame with only complete city
+        """
+        temp.sort_index(inplace=True)
         temp.dropna(axis=1, inplace=True)
         temp.sort_index(axis=1, inplace=True)
-        # last year has only 1 data from 365 needed to drop out
-        temp.drop(temp.index[temp.index.year == max(
-            temp.index.year.unique())], inplace=True)
-        # assign attribute
-        self.__temp = temp
-        self.__city = self.temp.columns
+        return temp
+
+    @staticmethod
+    def __header(line: bytes) -> List[str]:
+        """parse the header line of the csv file
+
+        Arguments:
+            line {bytes} -- first line of the file
+
+        Returns:
+            List[str] -- name of every column
+        """
+        return next(csv.reader([line.decode('utf-8-sig').strip()]), [])
+
+    @staticmethod
+    def __dtypes(columns: List[str]) -> Dict[str, type]:
+        """get dtype of every column of the csv file
+
+        Arguments:
+            columns {List[str]} -- name of every column
+
+        Returns:
+            Dict[str, type] -- str for Date and float for every city
+        """
+        # explicit dtype and date format so pandas doesn't have to guess them for every chunk
+        dtype = {column: np.float64 for column in columns}
+        dtype['Date'] = str
+        return dtype
+
+    def __stream(self, stream: IO[bytes], progress: Optional[Callable[[int], None]]) -> pd.DataFrame:
+        """parse the csv file chunk by chunk and publish the rows that already parsed,
+        every chunk is put at the end of a buffer that grow by doubling and only its dates
+        extend the axes so the rows that were published are never copied or indexed again
+
+        Arguments:
+            stream {IO[bytes]} -- binary stream of the csv file
+            progress {Optional[Callable[[int], None]]} -- called with number of parsed rows after every chunk
+
+        Returns:
+            pd.DataFrame -- cleaned DataFrame
+        """
+        columns, chunks = self.__chunks(stream)
+        cities = sorted(column for column in columns if column != 'Date')
+        values = np.empty((0, len(cities)))
+        indexes = []
+        rows = 0
+        # rows so far are published only while the dates are increasing, else they are sorted at the end
+        ordered = True
+        for chunk in chunks:
+            complete = ~chunk[cities].isna().to_numpy().any(axis=0)
+            dropped = not complete.all()
+            if dropped:
+                # city that has missing value is dropped like __tidy, it happen once for each city at most
+                cities = [city for city, keep in zip(cities, complete) if keep]
+                values = values[:, complete]
+            if rows + len(chunk) > len(values):
+                grown = np.empty((max(2 * len(values), rows + len(chunk)), len(cities)))
+                grown[:rows] = values[:rows]
+                values = grown
+            values[rows:rows + len(chunk)] = chunk[cities].to_numpy()
+            ordered = ordered and chunk.index.is_monotonic_increasing and (
+                not indexes or chunk.index[0] >= indexes[-1][-1])
+            indexes.append(chunk.index)
+            rows += len(chunk)
+            if ordered and (dropped or rows == len(chunk)):
+                # city list and rows so far can be query while the rest is parsing
+                self.__publish(pd.DataFrame(values[:rows], index=indexes[0].append(indexes[1:]),
+                                            columns=pd.Index(cities), copy=False), complete=False)
+            elif ordered:
+                self.__publish_rows(values[:rows], chunk.index)
+            if progress is not None:
+                progress(rows)
+
+        if not indexes:
+            return self.__clean(pd.DataFrame(columns=columns))
+        # capacity that wasn't filled isn't kept with the data
+        values = values[:rows] if rows == len(values) else values[:rows].copy()
+        return self.__tidy(pd.DataFrame(values, index=indexes[0].append(indexes[1:]),
+                                        columns=pd.Index(cities), copy=False))
+
+    @_synchronized
+    def __publish_rows(self, values: np.ndarray, index: pd.DatetimeIndex) -> None:
+        """publish the rows that were streamed after the last publish without rebuilding the axes
+
+        Arguments:
+            values {np.ndarray} -- day x city matrix of every row so far in the order of city
+            index {pd.DatetimeIndex} -- date of the new rows, all of them after the last date
+        """
+        self.__extend_axes(index)
+        self.__temp = pd.DataFrame(values, index=self.__index, columns=self.__city, copy=False)
+        self.__queries.clear()
+        self.__ranges.clear()
+
+    def __chunks(self, stream: IO[bytes]) -> Tuple[List[str], Iterator[pd.DataFrame]]:
+        """read the header then parse the rest of csv file chunk by chunk when it is iterated,
+        in memory budget a chunk is as many rows as the budget allow
+
+        Arguments:
+            stream {IO[bytes]} -- binary stream of the csv file
+
+        Returns:
+            Tuple[List[str], Iterator[pd.DataFrame]] -- name of every column and chunks indexed by date
+        """
+        text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+        columns = next(csv.reader([text.readline()]))
+        chunksize = CHUNK_SIZE
+        if self.__budget is not None:
+            chunksize = max(self.__budget // (len(columns) * PARSE_BYTES), 1)
+
+        def parse() -> Iterator[pd.DataFrame]:
+            for chunk in pd.read_csv(text, header=None, names=columns, dtype=self.__dtypes(columns),
+                                     chunksize=chunksize):
+                chunk['Date'] = pd.to_datetime(chunk['Date'], format=DATE_FORMAT)
+                yield chunk.set_index('Date')
+        return columns, parse()
+
+    def __load_chunked(self, filepath: str, prefix: str,
+                       progress: Optional[Callable[[int], None]] = None) -> pd.DataFrame:
+        """clean the csv file chunk by chunk into the store within the memory budget
+
+        Arguments:
+            filepath {str} -- url or local path of the csv file
+            prefix {str} -- prefix of the store
+
+        Keyword Arguments:
+            progress {Optional[Callable[[int], None]]} -- called with number of parsed rows
+                                                          after every chunk (default: {None})
+
+        Returns:
+            pd.DataFrame -- DataFrame backed by memory map
+        """
+        def counted(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+            rows = 0
+            for chunk in chunks:
+                yield chunk
+                rows += len(chunk)
+                if progress is not None:
+                    progress(rows)
+
+        with open_source(filepath) as stream:
+            _, chunks = self.__chunks(stream)
+            return write_chunks(prefix, counted(chunks), self.__budget)
+
+    def __build_cube_chunked(self, matrix: np.ndarray) -> Dict[str, np.ndarray]:
+        """compute the same statistics as __build_cube block by block
+        so only a block of the city x day matrix is in memory at once
+
+        Arguments:
+            matrix {np.ndarray} -- city x day matrix of temperature mapped from the store
+
+        Returns:
+            Dict[str, np.ndarray] -- 'overall', 'year' and 'month' segment x city x statistic array
+                                     and 'climate' city x 366 x band array
+        """
+        cities, days = matrix.shape
+        cube = {'overall': np.empty((1, cities, len(STATISTICS))),
+                'year': np.empty((len(self.__year_offsets), cities, len(STATISTICS))),
+                'month': np.empty((len(self.__month_offsets), cities, len(STATISTICS))),
+                'climate': np.empty((cities, YEAR_DAYS, len(CLIMATE_BANDS)), dtype=np.float32)}
+        # overall statistics and climatology need every day of a city
+        for first, last in self.__city_blocks(cities, days):
+            block = np.asarray(matrix[first:last]).T
+            cube['overall'][:, first:last] = describe_segments(block, {0: (0, days)})
+            cube['climate'][first:last] = climatology(block, self.__day_of_year)
+
+        # year and month statistics need only the days of their year
+        months = {}
+        for key, offset in self.__month_offsets.items():
+            months.setdefault(key[0], {})[key] = offset
+        for year, (start, stop) in self.__year_offsets.items():
+            segments = {key: (begin - start, end - start) for key, (begin, end) in months[year].items()}
+            positions = [self.__month_position[key] for key in segments]
+            for first, last in self.__city_blocks(cities, stop - start):
+                block = np.asarray(matrix[first:last, start:stop]).T
+                cube['year'][self.__year_position[year], first:last] = describe_segments(
+                    block, {year: (0, stop - start)})[0]
+                cube['month'][positions, first:last] = describe_segments(block, segments)
+        return cube
+
+    def __city_blocks(self, cities: int, days: int) -> Iterator[Tuple[int, int]]:
+        """split the cities into blocks whose days fit in the memory budget
+
+        Arguments:
+            cities {int} -- number of city
+            days {int} -- number of day of each city in a block
+
+        Returns:
+            Iterator[Tuple[int, int]] -- first and last (excluded) city of every block
+        """
+        step = max(self.__budget // (max(days, 1) * WORK_BYTES), 1)
+        return ((first, min(first + step, cities)) for first in range(0, cities, step))
+
+    def __build_axes(self, index: pd.DatetimeIndex) -> None:
+        """
+        build the date and year axis and the index of row offset of every year and
+        (year, month) in data so year and month mode can slice by position instead of date string
+        it is called once every time that data is read
+
+        Arguments:
+            index {pd.DatetimeIndex} -- date of every row of data
+        """
+        self.__index = index[:0]
+        self.__year_offsets = {}
+        self.__month_offsets = {}
+        self.__day_of_year = np.array([], dtype=np.int16)
+        self.__extend_axes(index)
+
+    def __extend_axes(self, index: pd.DatetimeIndex) -> Tuple[List[int], List[Tuple[int, int]]]:
+        """extend the date and year axis and the row offsets with the rows after the last one
+
+        Arguments:
+            index {pd.DatetimeIndex} -- date of every new row, all of them after the last date
+
+        Returns:
+            Tuple[List[int], List[Tuple[int, int]]] -- year and (year, month) that got new rows
+        """
+        start = len(self.__index)
+        self.__index = self.__index.append(index) if start else index
+        self.__date = None
+        # assume that data have no missing year
+        self.__year = range(self.__index[0].year, self.__index[-1].year + 1) if len(self.__index) else range(0)
+        years = self.__segments(index.year.to_numpy())
+        months = {divmod(key, 100): offset for key, offset in self.__segments(
+            index.year.to_numpy() * 100 + index.month.to_numpy()).items()}
+        for offsets, segments in ((self.__year_offsets, years), (self.__month_offsets, months)):
+            for key, (first, stop) in segments.items():
+                # the last year and month may continue in the new rows
+                first = offsets[key][0] if key in offsets else first + start
+                offsets[key] = (first, stop + start)
+        self.__day_of_year = np.concatenate((self.__day_of_year,
+                                             day_of_year(index.month.to_numpy(), index.day.to_numpy())))
+        self.__year_position = position(self.__year_offsets)
+        self.__month_position = position(self.__month_offsets)
+        return list(years), list(months)
+
+    def __build_cube(self, matrix: np.ndarray) -> Dict[str, np.ndarray]:
+        """compute describe statistics of overall, every year and every month
+        and the day of year climatology of every city in one pass
+
+        Arguments:
+            matrix {np.ndarray} -- day x city matrix of temperature
+
+        Returns:
+            Dict[str, np.ndarray] -- 'overall', 'year' and 'month' segment x city x statistic array
+                                     and 'climate' city x 366 x band array
+        """
+        return {'overall': describe_segments(matrix, {0: (0, len(matrix))}),
+                'year': describe_segments(matrix, self.__year_offsets),
+                'month': describe_segments(matrix, self.__month_offsets),
+                'climate': climatology(matrix, self.__day_of_year)}
+
+    def __city_cube(self, city: str) -> Tuple[Optional[Dict[str, np.ndarray]], int]:
+        """get the precomputed statistics that contain the city
+
+        Arguments:
+            city {str} -- a city in data
+
+        Returns:
+            Tuple[Optional[Dict[str, np.ndarray]], int] -- statistics (None while streaming)
+                                                          and position of the city in it
+        """
+        if self.__lazy is None:
+            row = self.__city.get_loc(city)
+            self.__refresh([row])
+            return self.__cube, row
+        # lazy storage compute statistics of a city when the city is first read
+        cube = self.__cubes.get(city)
+        if cube is None:
+            cube = self.__build_cube(self.__column(city).to_numpy()[:, None])
+            self.__cubes.put(city, cube)
+        return cube, 0
+
+    @staticmethod
+    def __segments(keys: np.ndarray) -> Dict[int, Tuple[int, int]]:
+        """find the start and stop of every run of equal key in sorted keys
+
+        Arguments:
+            keys {np.ndarray} -- sorted key of each row
+
+        Returns:
+            Dict[int, Tuple[int, int]] -- key mapped to its (start, stop) row offset
+        """
+        if len(keys) == 0:
+            return {}
+        change = np.flatnonzero(np.diff(keys)) + 1
+        starts = np.concatenate(([0], change))
+        stops = np.concatenate((change, [len(keys)]))
+        return {int(keys[start]): (int(start), int(stop))
+                for start, stop in zip(starts, stops)}
+
+    def __column(self, city: str) -> pd.Series:
+        """get temperature of a city, in lazy storage it is read from cache on first use
+        and in int16 dtype it is decoded on first use
+
+        Arguments:
+            city {str} -- a city in data
+
+        Returns:
+            pd.Series -- a Series of temperature of the city in all date
+        """
+        if self.__lazy is None and not self.__tenths:
+            return self.__temp[city]
+        column = self.__columns.get(city)
+        if column is None:
+            if self.__lazy is None:
+                array = decode_tenths(self.__temp[city].to_numpy())
+            else:
+                array = self.__lazy[f'c{self.__city.get_loc(city)}']
+            if self.__tail is not None:
+                array = np.concatenate((array, self.__tail[city].to_numpy()))
+            column = pd.Series(array, index=self.__index, name=city)
+            self.__columns.put(city, column)
+        return column
 
     @property
+    @_synchronized
     def temp(self) -> pd.DataFrame:
         """get Japan Data temperature of each city
 
         Returns:
             pd.DataFrame -- DataFrame of Japan Temperature pf each city
+                            in lazy storage every city is read to build it
+                            and in int16 dtype every city is decoded into float64
         """
+        if self.__lazy is not None:
+            temp = pd.DataFrame({city: self.__lazy[f'c{i}'] for i, city in enumerate(self.__city)},
+                                index=self.__index[:len(self.__index) - len(self.__tail)]
+                                if self.__tail is not None else self.__index)
+            return temp if self.__tail is None else pd.concat((temp, self.__tail))
+        if self.__tenths:
+            return pd.DataFrame(self.__values(), index=self.__temp.index, columns=self.__city)
         return self.__temp
 
     @property
@@ -61,45 +713,51 @@ class JapanTemperature:
         """
         return self.__city
 
-    def __get_date(self) -> List[pd.Timestamp]:
-        """All date of Data
+    @property
+    @_synchronized
+    def date(self) -> np.ndarray:
+        """get all date of data
 
         Returns:
-            List[pd.Timestamp] -- a list of date
+            np.ndarray -- empty array if data isn't read
+                          else an array of date in data in datetime64[D] format
         """
-        return list(self.__temp.index) if len(self.__temp != 0) else []
+        if self.__date is None:
+            # built once per load instead of on every access
+            self.__date = self.__index.values.astype('datetime64[D]')
+        return self.__date
 
-    def __get_year(self) -> List[int]:
-        """All year of Data
+    @property
+    def year(self) -> range:
+        """get all year of data
 
         Returns:
-            List[int] -- a list of year
+            range -- empty range if data isn't read else a range of year in data
         """
-        if len(self.__temp) != 0:
-            # assume that data have no missing year
-            return list(range(self.date[0].year, self.date[-1].year + 1))
-        return []
+        return self.__year
 
     @property
-    def date(self) -> List[pd.Timestamp]:
-        """get all date of data
+    @_synchronized
+    def partial_years(self) -> Tuple[int, ...]:
+        """get the years that don't have every day in data eg. the last year that is still going on
 
         Returns:
-            List[pd.Timestamp] -- empty list if data isn't read
-                                  else a list of date in data in TImestamp format
+            Tuple[int, ...] -- year that has fewer rows than its number of day
         """
-        return self.__get_date()
+        return tuple(year for year, (start, stop) in self.__year_offsets.items()
+                     if stop - start < (366 if calendar.isleap(year) else 365))
 
     @property
-    def year(self) -> List[int]:
-        """get all year of data
+    def fingerprint(self) -> Optional[str]:
+        """get the fingerprint of the source that was read last, other model can pass it
+        to _readfile to open the same cache or store without downloading or hashing the source
 
         Returns:
-            List[int] -- empty list if data isn't read else a list of year in data
+            Optional[str] -- content hash or validator of the server, None if nothing was read
         """
-        # assume that data have no missing year
-        return self.__get_year()
+        return self.__fingerprint
 
+    @_synchronized
     def get_temps(self, city: str) -> pd.Series:
         """get the temperature of a city in Japan
 
@@ -117,8 +775,9 @@ class JapanTemperature:
             raise TypeError('city must be a string')
         if city != '' and city not in self.city:
             raise CityNotFoundError(f'{city} not in Japan')
-        return self.temp[city]
+        return self.__column(city)
 
+    @_synchronized
     def overall_mode(self, city: str) -> pd.Series:
         """get the overall temperature of a city in Japan
 
@@ -128,8 +787,9 @@ class JapanTemperature:
         Returns:
             pd.Series -- Series of Japanese Temperature of specific city in all date
         """
-        return self.get_temps(city)
+        return self.__memoize(('series', city, 'overall', None, None), lambda: self.get_temps(city))
 
+    @_synchronized
     def year_mode(self, city: str, year: int) -> pd.Series:
         """get the temperature of a city in Japan in a specific year it for year mode in UI
 
@@ -140,8 +800,12 @@ class JapanTemperature:
         Returns:
             pd.Series -- a series of Temperature filtered by city and year
         """
-        return self.get_temps(city)[f'{year}-01-01': f'{year}-12-31']
+        def compute() -> pd.Series:
+            start, stop = self.__year_offsets.get(year, (0, 0))
+            return self.get_temps(city).iloc[start:stop]
+        return self.__memoize(('series', city, 'year', year, None), compute)
 
+    @_synchronized
     def month_mode(self, city: str, year: int, month: int) -> pd.Series:
         """get the temperature of a city in Japan in a specific month it for month mode in UI
 
@@ -150,11 +814,20 @@ class JapanTemperature:
             year {int} -- specific year in data
             month {int} -- specific month of selected year and city in data
 
+        Raises:
+            ValueError: Raises if month isn't between 1 and 12
+
         Returns:
             pd.Series -- a series of Temperature filtered by city and month
         """
-        last_day = pd.Period(f'{year}-{month}', freq='M').end_time.day
-        return self.get_temps(city)[f'{year}-{month}-01': f'{year}-{month}-{last_day}']
+        month = int(month)
+        if not 1 <= month <= 12:
+            raise ValueError('month must be between 1 and 12')
+
+        def compute() -> pd.Series:
+            start, stop = self.__month_offsets.get((year, month), (0, 0))
+            return self.get_temps(city).iloc[start:stop]
+        return self.__memoize(('series', city, 'month', year, month), compute)
 
     def get_describe(self, data: pd.Series) -> pd.core.series.Series:
         """get description of current data that plotted in UI
@@ -168,6 +841,638 @@ class JapanTemperature:
         # not include coount index
         return data.describe()[1:]
 
+    @_synchronized
+    def describe(self, city: str, year: Optional[int] = None, month: Optional[int] = None) -> pd.Series:
+        """get description of overall, year or month mode from the precomputed statistics
+
+        Arguments:
+            city {str} -- a city in Japan
+
+        Keyword Arguments:
+            year {Optional[int]} -- specific year, None for overall mode (default: {None})
+            month {Optional[int]} -- specific month of the year, None for year mode (default: {None})
+
+        Raises:
+            ValueError: Raises if month isn't between 1 and 12
+
+        Returns:
+            pd.Series -- mean, std, min, every quartile and max of the selected data
+        """
+        if month is not None:
+            month = int(month)
+            if not 1 <= month <= 12:
+                raise ValueError('month must be between 1 and 12')
+        mode = 'overall' if year is None else 'year' if month is None else 'month'
+        return self.__memoize(('describe', city, mode, year, month),
+                              lambda: self.__describe(city, year, month))
+
+    def __describe(self, city: str, year: Optional[int], month: Optional[int]) -> pd.Series:
+        """look the description up from the precomputed statistics
+
+        Arguments:
+            city {str} -- a city in Japan
+            year {Optional[int]} -- specific year, None for overall mode
+            month {Optional[int]} -- specific month of the year, None for year mode
+
+        Returns:
+            pd.Series -- mean, std, min, every quartile and max of the selected data
+        """
+        self.get_temps(city)
+        cube, row = self.__city_cube(city)
+        if cube is None:
+            # data is still streaming so there is no statistics yet
+            if year is None:
+                return self.get_describe(self.overall_mode(city))
+            if month is None:
+                return self.get_describe(self.year_mode(city, year))
+            return self.get_describe(self.month_mode(city, year, month))
+
+        values = np.full(len(STATISTICS), np.nan)
+        if year is None:
+            values = cube['overall'][0, row]
+        elif month is None:
+            if year in self.__year_position:
+                values = cube['year'][self.__year_position[year], row]
+        elif (year, month) in self.__month_position:
+            values = cube['month'][self.__month_position[(year, month)], row]
+        return pd.Series(values, index=STATISTICS, name=city)
+
+    @_synchronized
+    def append(self, filepath: str = FILEPATH) -> int:
+        """read only the rows after the last date from the source and extend the data
+        and everything derived from it without reading the whole data again
+
+        if the source was read before only the bytes after that read are parsed,
+        a separate file that contain only the new days can also be given
+
+        Keyword Arguments:
+            filepath {str} -- url or local path of the csv file (default: {FILEPATH})
+
+        Raises:
+            ValueError: Raises if data isn't read yet, a city is missing from the new rows,
+                        a new row has missing value or the new dates aren't increasing
+
+        Returns:
+            int -- number of appended rows
+        """
+        if self.__lazy is None and self.__cube is None:
+            raise ValueError('data must be completely read before appending')
+        known = self.__sources.get(filepath)
+        tail = fetch_tail(filepath, known[0]) if known is not None else None
+        if tail is None and self.__budget is not None:
+            # source can be larger than memory so it isn't read at once
+            size, columns, new = self.__read_after(filepath)
+        else:
+            if tail is None:
+                raw = fetch(filepath)
+                start = raw.find(b'\n') + 1
+                columns = self.__header(raw[:start])
+                tail = raw[start:]
+            else:
+                start, columns = known
+            # the last line may still be written so only complete lines are taken
+            stop = tail.rfind(b'\n') + 1
+            size, new = start + stop, self.__parse(tail[:stop], columns)
+        new = self.__validate(new)
+        if len(new):
+            self.__extend(new)
+        self.__sources[filepath] = (size, columns)
+        return len(new)
+
+    def __read_after(self, filepath: str) -> Tuple[int, List[str], pd.DataFrame]:
+        """parse the whole source block by block within the memory budget
+        and keep only the rows after the last date
+
+        Arguments:
+            filepath {str} -- url or local path of the csv file
+
+        Returns:
+            Tuple[int, List[str], pd.DataFrame] -- number of bytes of the complete lines,
+                                                   name of every column and the rows after the last date
+        """
+        # a value take at least 2 bytes of text so a block of this size parse within the budget
+        block_size = max(self.__budget // PARSE_BYTES, 1)
+        parts, rest = [], b''
+        with open_source(filepath) as stream:
+            header = stream.readline()
+            columns = self.__header(header)
+            size = len(header)
+            for block in iter(lambda: stream.read(block_size), b''):
+                block = rest + block
+                # the last line may still be written so only complete lines are taken
+                stop = block.rfind(b'\n') + 1
+                rest = block[stop:]
+                size += stop
+                rows = self.__parse(block[:stop], columns)
+                if len(self.__index):
+                    rows = rows[rows.index > self.__index[-1]]
+                if len(rows):
+                    parts.append(rows)
+        return size, columns, pd.concat(parts) if parts else self.__parse(b'', columns)
+
+    def __parse(self, data: bytes, columns: List[str]) -> pd.DataFrame:
+        """parse the rows of csv file without header
+
+        Arguments:
+            data {bytes} -- complete lines of the csv file
+            columns {List[str]} -- header of the file
+
+        Raises:
+            ValueError: Raises if Date column is missing or a value isn't a number or a date
+
+        Returns:
+            pd.DataFrame -- DataFrame indexed by date
+        """
+        if 'Date' not in columns:
+            raise ValueError('csv file has no Date column')
+        if not data.strip():
+            return pd.DataFrame(columns=[column for column in columns if column != 'Date'],
+                                index=pd.DatetimeIndex([], name='Date'), dtype=np.float64)
+        temp = pd.read_csv(io.BytesIO(data), header=None, names=columns, dtype=self.__dtypes(columns))
+        temp['Date'] = pd.to_datetime(temp['Date'], format=DATE_FORMAT)
+        return temp.set_index('Date')
+
+    def __validate(self, new: pd.DataFrame) -> pd.DataFrame:
+        """keep only the rows after the last date and the cities in data then check them
+
+        Arguments:
+            new {pd.DataFrame} -- parsed rows
+
+        Raises:
+            ValueError: Raises if a city is missing, a value is missing or the dates aren't increasing
+
+        Returns:
+            pd.DataFrame -- rows that can be appended with columns in the order of city
+        """
+        missing = [city for city in self.__city if city not in new.columns]
+        if missing:
+            raise ValueError(f'{", ".join(missing)} not in the new rows')
+        if len(self.__index):
+            new = new[new.index > self.__index[-1]]
+        new = new.loc[:, self.__city]
+        if not new.index.is_monotonic_increasing or new.index.has_duplicates:
+            raise ValueError('dates of the new rows must be increasing')
+        incomplete = new.isna().any(axis=1)
+        if incomplete.any():
+            raise ValueError(f'missing value at {new.index[incomplete][0].date()}')
+        return new
+
+    def __extend(self, new: pd.DataFrame) -> None:
+        """append the rows then update the axes and the statistics of only the changed year, month and day
+
+        Arguments:
+            new {pd.DataFrame} -- validated rows after the last date
+        """
+        if self.__lazy is not None:
+            # cache file isn't changed, new rows are kept beside it
+            self.__tail = new if self.__tail is None else pd.concat((self.__tail, new))
+            self.__columns.clear()
+            self.__cubes.clear()
+        elif self.__prefix is not None:
+            # store is city x day so the days are put into a new version of it that stay float32
+            # and memory-mapped, the source file changed so the version belong only to this model
+            version = f'{self.__prefix}+{len(self.__index) + len(new)}'
+            self.__temp = extend_store(version, self.__temp, new, self.__budget or COPY_BYTES)
+            self.__drop_version()
+            self.__version = version
+        else:
+            self.__temp = pd.concat((self.__temp, self.__compact(new)))
+            self.__columns.clear()
+        years, months = self.__extend_axes(new.index)
+        self.__queries.clear()
+        self.__ranges.clear()
+        if self.__lazy is None:
+            self.__extend_cube(years, months, self.__day_of_year[-len(new):])
+
+    def __extend_cube(self, years: List[int], months: List[Tuple[int, int]], days: np.ndarray) -> None:
+        """recompute the statistics of the year, month and day of year that got new rows
+
+        Arguments:
+            years {List[int]} -- year that got new rows
+            months {List[Tuple[int, int]]} -- (year, month) that got new rows
+            days {np.ndarray} -- position in 366 days year of every new row
+        """
+        # view of the store in memmap storage, only the rows of the changed segments are read
+        matrix = self.__values()
+        days = np.unique(days)
+        rows = np.flatnonzero(np.isin(self.__day_of_year, days))
+        segments = {}
+        for kind, keys, offsets, positions in (
+                ('year', years, self.__year_offsets, self.__year_position),
+                ('month', months, self.__month_offsets, self.__month_position)):
+            cube = self.__cube[kind]
+            if len(offsets) > len(cube):
+                cube = np.concatenate((cube, np.full((len(offsets) - len(cube), *cube.shape[1:]), np.nan)))
+            self.__cube[kind] = cube
+            segments[kind] = ([positions[key] for key in keys], {key: offsets[key] for key in keys})
+        # in memory budget the cities are reduced block by block like __build_cube_chunked
+        longest = max([len(rows)] + [stop - start for _, bounds in segments.values()
+                                     for start, stop in bounds.values()])
+        blocks = (self.__city_blocks(len(self.__city), longest) if self.__budget is not None
+                  else [(0, len(self.__city))])
+        for first, last in blocks:
+            for kind, (positions, bounds) in segments.items():
+                self.__cube[kind][positions, first:last] = describe_segments(matrix[:, first:last], bounds)
+            self.__cube['climate'][first:last, days] = climatology(
+                matrix[rows, first:last], self.__day_of_year[rows])[:, days]
+        # overall statistics of every city take a while so each city is recomputed when it is needed
+        self.__stale = np.ones(len(self.__city), dtype=bool)
+
+    def __refresh(self, positions: Iterable[int]) -> None:
+        """recompute the overall statistics of the cities that became stale after append
+
+        Arguments:
+            positions {Iterable[int]} -- position of the cities that are going to be read
+        """
+        if self.__stale is None:
+            return
+        stale = [row for row in positions if self.__stale[row]]
+        if stale:
+            matrix = self.__values(columns=stale)
+            self.__cube['overall'][0, stale] = describe_segments(matrix, {0: (0, len(matrix))})[0]
+            self.__stale[stale] = False
+
+    def __memoize(self, key: Tuple, compute: Callable[[], pd.Series]) -> pd.Series:
+        """get the result from query cache or compute then cache it
+
+        Arguments:
+            key {Tuple} -- (kind, city, mode, year, month) of the query
+            compute {Callable[[], pd.Series]} -- compute the result when it isn't in cache
+
+        Returns:
+            pd.Series -- result of the query
+        """
+        result = self.__queries.get(key)
+        if result is None:
+            result = compute()
+            self.__queries.put(key, result)
+        return result
+
+    def cache_info(self) -> Dict[str, int]:
+        """get hits, misses and size of the query cache
+
+        Returns:
+            Dict[str, int] -- statistics of the query cache
+        """
+        return self.__queries.info()
+
+    @_synchronized
+    def memory_usage(self) -> Dict[str, int]:
+        """get bytes of memory that each part of the model hold,
+        array that is a view of the temperature is counted only once in 'temperature'
+
+        Returns:
+            Dict[str, int] -- bytes of 'temperature' in memory, 'mapped' store that the OS page in
+                              and share between processes, 'columns' that were read or decoded,
+                              'dates' axes, 'cities' names, precomputed 'statistics', 'range_index',
+                              'queries' in the query cache and 'total' of every part except 'mapped'
+        """
+        data = self.__temp.to_numpy() if isinstance(self.__temp, pd.DataFrame) else np.empty(0)
+        mapped = self.__mapped(data)
+        # views share the buffer with the data or with the date axis so they are free
+        shared = [data, np.asarray(self.__index.values)]
+
+        def owned(values) -> int:
+            values = np.asarray(values)
+            return 0 if any(np.may_share_memory(values, each) for each in shared) else values.nbytes
+
+        def frame(result) -> int:
+            if isinstance(result, pd.DataFrame):
+                return sum(owned(result[column].to_numpy()) for column in result.columns)
+            return owned(result.to_numpy())
+
+        columns = [column.to_numpy() for column in self.__columns.values()]
+        cubes = ([self.__cube] if self.__cube is not None else []) + self.__cubes.values()
+        usage = {
+            'temperature': 0 if mapped else data.nbytes,
+            'mapped': data.nbytes if mapped else 0,
+            'columns': sum(owned(column) for column in columns),
+            'dates': self.__index.nbytes + self.__day_of_year.nbytes
+            + (self.__date.nbytes if self.__date is not None else 0),
+            'cities': int(pd.Index(self.__city).memory_usage(deep=True)),
+            'statistics': sum(array.nbytes for cube in cubes for array in cube.values())
+            + (self.__stale.nbytes if self.__stale is not None else 0),
+            'range_index': sum(ranges.nbytes for ranges in self.__ranges.values()),
+        }
+        # year and month of a column that was read or decoded are views of the column
+        shared.extend(columns)
+        usage['queries'] = sum(frame(result) for result in self.__queries.values())
+        if self.__tail is not None:
+            usage['temperature'] += self.__tail.to_numpy().nbytes
+        usage['total'] = sum(value for name, value in usage.items() if name != 'mapped')
+        return usage
+
+    @staticmethod
+    def __mapped(values: np.ndarray) -> bool:
+        """check whether the array is a view of memory-mapped file
+
+        Arguments:
+            values {np.ndarray} -- array or view
+
+        Returns:
+            bool -- True if memory map is one of its base
+        """
+        while values is not None:
+            if isinstance(values, (np.memmap, mmap.mmap)):
+                return True
+            values = getattr(values, 'base', None)
+        return False
+
+    @_synchronized
+    def query_cities(self, cities: Optional[Iterable[str]] = None, year: Optional[int] = None,
+                     month: Optional[int] = None, anomaly: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """get temperature and description of many city in one slice for comparing mode
+
+        Keyword Arguments:
+            cities {Optional[Iterable[str]]} -- cities in Japan, None for every city (default: {None})
+            year {Optional[int]} -- specific year, None for overall mode (default: {None})
+            month {Optional[int]} -- specific month of the year, None for year mode (default: {None})
+            anomaly {bool} -- subtract the day of year climatology mean from the temperature (default: {False})
+
+        Raises:
+            CityNotFoundError: Raises if any city not in Japan or invlid city
+            ValueError: Raises if month isn't between 1 and 12
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame] -- date x city temperature and city x statistic description
+        """
+        names = list(self.city) if cities is None else list(cities)
+        unknown = [city for city in names if not isinstance(city, str) or city not in self.__city]
+        if unknown:
+            raise CityNotFoundError(f'{", ".join(map(str, unknown))} not in Japan')
+        if month is not None:
+            month = int(month)
+            if not 1 <= month <= 12:
+                raise ValueError('month must be between 1 and 12')
+
+        start, stop, kind, segment = self.__bounds(year, month)
+        if self.__lazy is not None:
+            data = pd.DataFrame({city: self.__column(city).iloc[start:stop] for city in names},
+                                index=self.__index[start:stop])
+        else:
+            # one positional slice of rows and columns for every city at once
+            positions = self.__city.get_indexer(names)
+            if self.__tenths:
+                data = pd.DataFrame(self.__values(slice(start, stop), positions),
+                                    index=self.__index[start:stop], columns=names)
+            else:
+                data = self.__temp.iloc[start:stop, positions]
+        if anomaly:
+            # every city and day minus the climatology mean of its day of year in one broadcast
+            means = self.__climate(names)[:, self.__day_of_year[start:stop], 0]
+            data = data - means.T
+            return data, data.describe().T.iloc[:, 1:]
+
+        if self.__lazy is not None:
+            described = pd.DataFrame([self.describe(city, year, month) for city in names],
+                                     index=names, columns=STATISTICS)
+            return data, described
+        positions = self.__city.get_indexer(names)
+        if self.__cube is None:
+            # data is still streaming so there is no statistics yet
+            described = data.describe().T.iloc[:, 1:]
+        elif segment is None:
+            described = pd.DataFrame(np.nan, index=names, columns=STATISTICS)
+        else:
+            if kind == 'overall':
+                self.__refresh(positions)
+            described = pd.DataFrame(self.__cube[kind][segment, positions],
+                                     index=names, columns=STATISTICS)
+        return data, described
+
+    @_synchronized
+    def climatology(self, city: str) -> pd.DataFrame:
+        """get mean and percentile bands of every day of year over every year of a city
+
+        Arguments:
+            city {str} -- a city in Japan
+
+        Raises:
+            TypeError: Raises if param city isn't a string it will raise
+            CityNotFoundError: Raises if city not in Japan or invlid city
+
+        Returns:
+            pd.DataFrame -- 366 days (29th February is day 60) x band climatology
+        """
+        self.get_temps(city)
+        return pd.DataFrame(self.__climate([city])[0], columns=CLIMATE_BANDS,
+                            index=pd.RangeIndex(1, YEAR_DAYS + 1, name='day'))
+
+    @_synchronized
+    def anomaly_mode(self, city: str, year: Optional[int] = None, month: Optional[int] = None) -> pd.Series:
+        """get the temperature of overall, year or month mode minus the climatology mean of each day
+
+        Arguments:
+            city {str} -- a city in Japan
+
+        Keyword Arguments:
+            year {Optional[int]} -- specific year, None for overall mode (default: {None})
+            month {Optional[int]} -- specific month of the year, None for year mode (default: {None})
+
+        Raises:
+            ValueError: Raises if month isn't between 1 and 12
+
+        Returns:
+            pd.Series -- a series of temperature anomaly of the selected data
+        """
+        if month is not None:
+            month = int(month)
+            if not 1 <= month <= 12:
+                raise ValueError('month must be between 1 and 12')
+        mode = 'overall' if year is None else 'year' if month is None else 'month'
+
+        def compute() -> pd.Series:
+            start, stop, _, _ = self.__bounds(year, month)
+            data = self.get_temps(city).iloc[start:stop]
+            return data - self.__climate([city])[0, self.__day_of_year[start:stop], 0]
+        return self.__memoize(('anomaly', city, mode, year, month), compute)
+
+    @_synchronized
+    def heatmap(self, year: Optional[int] = None, anomaly: bool = False) -> pd.DataFrame:
+        """get every city in one city x day matrix for drawing it as one image
+
+        Keyword Arguments:
+            year {Optional[int]} -- specific year, None for the day of year climatology mean (default: {None})
+            anomaly {bool} -- subtract the climatology mean from the temperature of the year,
+                              it is ignored for the climatology (default: {False})
+
+        Returns:
+            pd.DataFrame -- city x date of the year (or city x day of year) temperature
+        """
+        if year is None:
+            return pd.DataFrame(self.__climate(list(self.__city))[:, :, 0], index=self.__city,
+                                columns=pd.RangeIndex(1, YEAR_DAYS + 1, name='day'))
+
+        def compute() -> pd.DataFrame:
+            start, stop, _, _ = self.__bounds(year, None)
+            if self.__lazy is not None:
+                values = np.stack([self.__column(city).to_numpy()[start:stop] for city in self.__city])
+            else:
+                # memmap storage is already city x day so this is a view without copy
+                values = self.__values(slice(start, stop)).T
+            if anomaly:
+                values = values - self.__climate(list(self.__city))[:, self.__day_of_year[start:stop], 0]
+            return pd.DataFrame(values, index=self.__city, columns=self.__index[start:stop])
+        return self.__memoize(('heatmap', None, 'year', year, anomaly), compute)
+
+    @_synchronized
+    def range_stats(self, city: str, start=None, end=None) -> pd.Series:
+        """get mean, min and max of a city between any two dates from the range query index
+
+        Arguments:
+            city {str} -- a city in Japan
+
+        Keyword Arguments:
+            start {Optional[str, datetime-like]} -- first date, None for the first date in data (default: {None})
+            end {Optional[str, datetime-like]} -- last date (included), None for the last date in data (default: {None})
+
+        Raises:
+            TypeError: Raises if param city isn't a string it will raise
+            CityNotFoundError: Raises if city not in Japan or invlid city
+
+        Returns:
+            pd.Series -- mean, min and max of the span, NaN if no date is in it
+        """
+        self.get_temps(city)
+        first = 0 if start is None else int(self.__index.searchsorted(self.__day(start), 'left'))
+        stop = len(self.__index) if end is None else int(self.__index.searchsorted(self.__day(end), 'right'))
+        ranges, column = self.__range_index(city)
+        values = [ranges.mean(first, stop)[column], ranges.min(first, stop)[column],
+                  ranges.max(first, stop)[column]]
+        return pd.Series(values, index=['mean', 'min', 'max'], name=city)
+
+    @_synchronized
+    def rolling_mean(self, city: str, window: int) -> pd.Series:
+        """get mean of the window of days that end at every date of a city from the prefix sums
+
+        Arguments:
+            city {str} -- a city in Japan
+            window {int} -- number of day in the window
+
+        Raises:
+            ValueError: Raises if window is less than 1
+
+        Returns:
+            pd.Series -- rolling mean indexed by date, NaN before the first full window
+        """
+        window = int(window)
+
+        def compute() -> pd.Series:
+            self.get_temps(city)
+            ranges, column = self.__range_index(city)
+            return pd.Series(ranges.rolling_mean(window, column), index=self.__index, name=city)
+        return self.__memoize(('rolling', city, 'overall', window, None), compute)
+
+    def __range_index(self, city: str) -> Tuple[RangeQueryIndex, int]:
+        """get the range query index that contain the city, it is built on first range query
+
+        Arguments:
+            city {str} -- a city in data
+
+        Returns:
+            Tuple[RangeQueryIndex, int] -- the index and position of the city in it
+        """
+        if self.__lazy is None and self.__cube is None:
+            # data is still streaming so the index of the rows so far isn't kept
+            return RangeQueryIndex(self.__column(city).to_numpy()[:, None]), 0
+        # lazy storage, memory budget and compact dtype index each city that is read
+        # because float64 prefix sums of every city are as large as the float64 data
+        per_city = self.__lazy is not None or self.__budget is not None or self.__dtype != 'float64'
+        key = city if per_city else None
+        ranges = self.__ranges.get(key)
+        if ranges is None:
+            matrix = self.__column(city).to_numpy()[:, None] if key is not None else self.__temp.to_numpy()
+            ranges = RangeQueryIndex(matrix)
+            self.__ranges.put(key, ranges)
+        return ranges, 0 if key is not None else self.__city.get_loc(city)
+
+    @staticmethod
+    def __day(date) -> pd.Timestamp:
+        """convert date into the unit of date axis
+
+        Arguments:
+            date {str, datetime-like} -- date eg. '2000-02-29'
+
+        Returns:
+            pd.Timestamp -- midnight of the date
+        """
+        return pd.Timestamp(date).normalize()
+
+    def __bounds(self, year: Optional[int], month: Optional[int]) -> Tuple[int, int, str, Optional[int]]:
+        """find the rows and the precomputed statistics of overall, year or month mode
+
+        Arguments:
+            year {Optional[int]} -- specific year, None for overall mode
+            month {Optional[int]} -- specific month of the year, None for year mode
+
+        Returns:
+            Tuple[int, int, str, Optional[int]] -- start and stop row offset, kind of statistics
+                                                   and its position (None if it isn't in data)
+        """
+        if year is None:
+            return 0, len(self.__index), 'overall', 0
+        if month is None:
+            start, stop = self.__year_offsets.get(year, (0, 0))
+            return start, stop, 'year', self.__year_position.get(year)
+        start, stop = self.__month_offsets.get((year, month), (0, 0))
+        return start, stop, 'month', self.__month_position.get((year, month))
+
+    def __climate(self, cities: List[str]) -> np.ndarray:
+        """get the precomputed climatology of cities
+
+        Arguments:
+            cities {List[str]} -- cities in data
+
+        Returns:
+            np.ndarray -- city x 366 x band climatology in the order of cities
+        """
+        if self.__lazy is not None:
+            return np.stack([self.__city_cube(city)[0]['climate'][0] for city in cities])
+        positions = self.__city.get_indexer(cities)
+        if self.__cube is None:
+            # data is still streaming so climatology is computed from the rows so far
+            return climatology(self.__values(columns=positions), self.__day_of_year)
+        return self.__cube['climate'][positions]
+
+    @_synchronized
+    def year_statistics(self) -> pd.DataFrame:
+        """get description of every city in every year
+
+        Returns:
+            pd.DataFrame -- statistics indexed by (city, year)
+        """
+        return self.__statistics('year', self.__year_offsets, ['city', 'year'])
+
+    @_synchronized
+    def month_statistics(self) -> pd.DataFrame:
+        """get description of every city in every month of every year
+
+        Returns:
+            pd.DataFrame -- statistics indexed by (city, year, month)
+        """
+        return self.__statistics('month', self.__month_offsets, ['city', 'year', 'month'])
+
+    def __statistics(self, kind: str, segments: Dict, names: List[str]) -> pd.DataFrame:
+        """flatten the precomputed statistics into DataFrame
+
+        Arguments:
+            kind {str} -- 'year' or 'month'
+            segments {Dict} -- offsets of the kind
+            names {List[str]} -- name of each level of index
+
+        Returns:
+            pd.DataFrame -- statistics indexed by city then keys of segments
+        """
+        cube = self.__cube
+        if cube is None:
+            cube = self.__build_cube(self.temp.to_numpy())
+        keys = [key if isinstance(key, tuple) else (key,) for key in segments]
+        index = pd.MultiIndex.from_tuples([(city, *key) for city in self.city for key in keys],
+                                          names=names)
+        # segment x city x statistic -> city x segment x statistic
+        values = np.swapaxes(cube[kind], 0, 1).reshape(-1, len(STATISTICS))
+        return pd.DataFrame(values, index=index, columns=STATISTICS)
+
 
 class CityNotFoundError(Exception):
     """
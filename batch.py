@@ -0,0 +1,162 @@
+"""
+This is the headless batch renderer of Japan City Temperature Analyis Project
+it render overall, year and month chart of many city straight to image file
+without creating any Tk window
+
+usage: python batch.py --cities Tokyo Osaka --modes year month --years 2000 2001 --out charts
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+# Agg canvas is used directly so pyplot and Tk are never imported
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from backend import FILEPATH, JapanTemperature
+from datacache import CACHE_DIR
+from plotter import (MODES, LevelOfDetail, draw_series, plot_label, plot_title,
+                     query)
+
+# (city, mode, year, month) of one chart
+Job = Tuple[str, str, Optional[int], Optional[int]]
+
+# dataset of the worker process, it is read once by init_worker
+_database: Optional[JapanTemperature] = None
+_options: Optional[argparse.Namespace] = None
+
+
+def init_worker(options: argparse.Namespace, fingerprint: Optional[str] = None) -> None:
+    """read the dataset once for every worker process
+
+    Arguments:
+        options {argparse.Namespace} -- parsed command line arguments
+
+    Keyword Arguments:
+        fingerprint {Optional[str]} -- fingerprint of the source that the parent already read
+                                       so the worker only open its store (default: {None})
+    """
+    global _database, _options
+    _options = options
+    _database = JapanTemperature(storage=options.storage, memory_budget=options.memory_budget)
+    _database._readfile(options.source, cache_dir=options.cache_dir, fingerprint=fingerprint)
+
+
+def render(job: Job) -> str:
+    """render one chart into file
+
+    Arguments:
+        job {Job} -- (city, mode, year, month) of the chart
+
+    Returns:
+        str -- path of the rendered file
+    """
+    city, mode, year, month = job
+    year_text = '' if year is None else str(year)
+    month_text = '' if month is None else str(month)
+
+    figure = Figure(figsize=(_options.width / _options.dpi, _options.height / _options.dpi),
+                    dpi=_options.dpi)
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    data, _ = query(_database, mode, city, year_text, month_text)
+    line = draw_series(ax, LevelOfDetail(ax), mode, data,
+                       plot_label(mode, city, year_text, month_text),
+                       plot_title(mode, city, year_text, month_text, compare=False))
+    ax.legend(handles=[line], loc='best')
+
+    name = '_'.join(part for part in (city, mode, year_text, month_text.zfill(2) if month_text else '')
+                    if part)
+    path = os.path.join(_options.out, f'{name}.{_options.format}')
+    figure.savefig(path)
+    return path
+
+
+def make_jobs(database: JapanTemperature, options: argparse.Namespace) -> Iterator[Job]:
+    """list every chart that has to be rendered
+
+    Arguments:
+        database {JapanTemperature} -- the read dataset
+        options {argparse.Namespace} -- parsed command line arguments
+
+    Returns:
+        Iterator[Job] -- (city, mode, year, month) of every chart
+    """
+    cities = options.cities or list(database.city)
+    # year that doesn't have every day is rendered only when it is asked for
+    partial = database.partial_years
+    years = options.years or [year for year in database.year if year not in partial]
+    years = [year for year in years if year in database.year]
+    for city in cities:
+        if 'overall' in options.modes:
+            yield city, 'overall', None, None
+        for year in years:
+            if 'year' in options.modes:
+                yield city, 'year', year, None
+            if 'month' in options.modes:
+                for month in options.months:
+                    yield city, 'month', year, month
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """parse the command line arguments
+
+    Keyword Arguments:
+        argv {Optional[List[str]]} -- arguments, None for sys.argv (default: {None})
+
+    Returns:
+        argparse.Namespace -- parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Render Japan temperature charts to image files')
+    parser.add_argument('--cities', nargs='+', help='cities to render (default: every city)')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--years', nargs='+', type=int, help='years to render (default: every year that has every day)')
+    parser.add_argument('--months', nargs='+', type=int, default=list(range(1, 13)),
+                        choices=range(1, 13), metavar='MONTH')
+    parser.add_argument('--format', choices=('png', 'svg'), default='png')
+    parser.add_argument('--out', default='charts', help='output directory')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--width', type=int, default=1200, help='width in pixel')
+    parser.add_argument('--height', type=int, default=600, help='height in pixel')
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--source', default=FILEPATH, help='url or path of the csv file')
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--storage', choices=JapanTemperature.STORAGES, default='memmap',
+                        help='memmap let every worker share one copy of the data')
+    parser.add_argument('--memory-budget', type=int, metavar='MB',
+                        help='read csv file larger than memory into memmap storage within MB of memory')
+    options = parser.parse_args(argv)
+    if options.memory_budget is not None:
+        options.memory_budget <<= 20
+    return options
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """render every chart that selected by command line arguments
+
+    Keyword Arguments:
+        argv {Optional[List[str]]} -- arguments, None for sys.argv (default: {None})
+    """
+    options = parse_args(argv)
+    os.makedirs(options.out, exist_ok=True)
+    start = time.perf_counter()
+    # source is downloaded and hashed once here, workers find the cache or store by its fingerprint
+    database = JapanTemperature(storage=options.storage, memory_budget=options.memory_budget)
+    database._readfile(options.source, cache_dir=options.cache_dir)
+    for city in options.cities or []:
+        database.get_temps(city)
+    jobs = list(make_jobs(database, options))
+
+    with ProcessPoolExecutor(max_workers=options.workers, initializer=init_worker,
+                             initargs=(options, database.fingerprint)) as executor:
+        chunksize = max(len(jobs) // (options.workers * 4), 1)
+        for _ in executor.map(render, jobs, chunksize=chunksize):
+            pass
+    print(f'rendered {len(jobs)} charts into {options.out} in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
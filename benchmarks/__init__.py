@@ -0,0 +1,3 @@
+"""
+Offline benchmarks of Japan City Temperature Analyis Project
+"""
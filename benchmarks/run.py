@@ -0,0 +1,182 @@
+"""
+This module time the hot path of the application against synthetic data
+without network access or any window then write the result as json
+
+usage: python -m benchmarks.run --cities 50 --years 66 --out bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from backend import JapanTemperature
+from benchmarks.synthetic import generate
+from plotter import LevelOfDetail, draw_series, plot_label, plot_title, query
+from search import CitySearchIndex
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """time the function several times
+
+    Arguments:
+        func {Callable[[], object]} -- function to be timed
+        repeat {int} -- number of run
+
+    Returns:
+        Dict[str, float] -- min, median and mean second of the runs
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {'repeat': repeat, 'min': min(times), 'median': statistics.median(times),
+            'mean': statistics.mean(times)}
+
+
+def read(path: str, cache_dir: Optional[str], **kwargs) -> JapanTemperature:
+    """read the csv file into new model
+
+    Arguments:
+        path {str} -- path of the csv file
+        cache_dir {Optional[str]} -- directory of the on-disk cache or None
+
+    Returns:
+        JapanTemperature -- the read model
+    """
+    database = JapanTemperature(**kwargs)
+    database._readfile(path, cache_dir=cache_dir)
+    return database
+
+
+def render(database: JapanTemperature, mode: str, city: str, year: str, month: str) -> None:
+    """render one plot the same way as UI does but into Agg canvas
+
+    Arguments:
+        database {JapanTemperature} -- the read model
+        mode {str} -- 'overall', 'year' or 'month'
+        city {str} -- plotted city
+        year {str} -- selected year
+        month {str} -- selected month
+    """
+    figure = Figure(figsize=(8, 5))
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot()
+    data, _ = query(database, mode, city, year, month)
+    draw_series(ax, LevelOfDetail(ax), mode, data,
+                plot_label(mode, city, year, month), plot_title(mode, city, year, month))
+    ax.legend(loc='best')
+    canvas.draw()
+
+
+def run(options: argparse.Namespace) -> Dict:
+    """run every benchmark
+
+    Arguments:
+        options {argparse.Namespace} -- parsed command line arguments
+
+    Returns:
+        Dict -- environment and result of every benchmark
+    """
+    repeat = options.repeat
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'temperature.csv')
+        cache_dir = os.path.join(directory, 'cache')
+        generate(path, options.cities, options.years, options.nan_columns, seed=options.seed)
+
+        results['readfile_nocache'] = measure(lambda: read(path, None), repeat)
+        read(path, cache_dir)
+        results['readfile_warm_cache'] = measure(lambda: read(path, cache_dir), repeat)
+        results['readfile_memmap_warm'] = measure(
+            lambda: read(path, cache_dir, storage='memmap'), repeat)
+        # new cache directory every run so the csv file is cleaned chunk by chunk into the store
+        results['readfile_memory_budget_cold'] = measure(
+            lambda: read(path, tempfile.mkdtemp(dir=directory), storage='memmap', memory_budget=16 << 20), repeat)
+
+        # query cache of size 1 and changing key so every call is a miss
+        database = read(path, cache_dir, max_queries=1)
+        cities = list(database.city)
+        years = list(database.year)
+        pairs = [(city, year) for city in cities for year in years]
+        results['get_temps'] = measure(lambda: [database.get_temps(city) for city in cities], repeat)
+        results['year_mode'] = measure(
+            lambda: [database.year_mode(city, year) for city, year in pairs], repeat)
+        results['month_mode'] = measure(
+            lambda: [database.month_mode(city, year, 6) for city, year in pairs], repeat)
+        results['get_describe'] = measure(
+            lambda: [database.get_describe(database.year_mode(city, year)) for city, year in pairs[:200]],
+            repeat)
+        results['describe'] = measure(
+            lambda: [database.describe(city, year) for city, year in pairs], repeat)
+
+        spans = [(f'{year}-03-15', f'{year + 1}-10-20') for year in years[:-1]]
+        results['range_stats'] = measure(
+            lambda: [database.range_stats(city, start, end) for city in cities for start, end in spans],
+            repeat)
+        results['rolling_mean'] = measure(
+            lambda: [database.rolling_mean(city, window) for city in cities for window in (7, 30)], repeat)
+
+        index = CitySearchIndex(cities)
+        typed = 'city01'
+        results['city_search'] = measure(
+            lambda: [index.search(typed[:end]) for end in range(len(typed) + 1)], repeat)
+
+        city, year = cities[0], str(years[len(years) // 2])
+        for mode in ('overall', 'year', 'month'):
+            results[f'render_{mode}'] = measure(
+                lambda: render(database, mode, city, year, '6'), repeat)
+
+        # number of call in one run so result can be compared per call
+        calls = {'get_temps': len(cities), 'year_mode': len(pairs), 'month_mode': len(pairs),
+                 'get_describe': min(len(pairs), 200), 'describe': len(pairs),
+                 'range_stats': len(cities) * (len(years) - 1), 'rolling_mean': 2 * len(cities),
+                 'city_search': len(typed) + 1}
+        for name, result in results.items():
+            result['calls'] = calls.get(name, 1)
+
+    return {
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                        'pandas': pd.__version__, 'matplotlib': matplotlib.__version__,
+                        'machine': platform.machine(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'dataset': {'cities': options.cities, 'years': options.years,
+                    'nan_columns': options.nan_columns, 'seed': options.seed},
+        'results': results,
+    }
+
+
+def main() -> None:
+    """
+    run benchmarks from command line arguments and write the json
+    """
+    parser = argparse.ArgumentParser(description='Benchmark Japan temperature hot paths offline')
+    parser.add_argument('--cities', type=int, default=50)
+    parser.add_argument('--years', type=int, default=66)
+    parser.add_argument('--nan-columns', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', default='bench.json', help='path of the json result, - for stdout')
+    options = parser.parse_args()
+
+    report = json.dumps(run(options), indent=2)
+    if options.out == '-':
+        print(report)
+    else:
+        with open(options.out, 'w') as file:
+            file.write(report)
+        print(f'benchmark result is written into {options.out}')
+
+
+if __name__ == '__main__':
+    main()
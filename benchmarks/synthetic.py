@@ -0,0 +1,67 @@
+"""
+This module generate synthetic csv file in the same shape as the real dataset
+Date column then one column per city, the last year has only its first day
+"""
+
+import argparse
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+
+def city_names(count: int) -> List[str]:
+    """make unique city names
+
+    Arguments:
+        count {int} -- number of city
+
+    Returns:
+        List[str] -- city names
+    """
+    return [f'City{i:04d}' for i in range(count)]
+
+
+def generate(path: str, cities: int = 50, years: int = 66, nan_columns: int = 0,
+             start_year: int = 1955, seed: int = 0) -> None:
+    """write the synthetic csv file
+
+    Arguments:
+        path {str} -- path of the csv file
+
+    Keyword Arguments:
+        cities {int} -- number of complete city (default: {50})
+        years {int} -- number of complete year (default: {66})
+        nan_columns {int} -- number of extra city that has missing value (default: {0})
+        start_year {int} -- first year of data (default: {1955})
+        seed {int} -- seed of random generator (default: {0})
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(f'{start_year}-01-01', f'{start_year + years}-01-01', freq='D')
+    season = -10 * np.cos(2 * np.pi * dates.dayofyear.to_numpy() / 365.25)
+    base = rng.uniform(5, 25, cities + nan_columns)
+    values = base + season[:, None] + rng.normal(0, 3, (len(dates), cities + nan_columns))
+    temp = pd.DataFrame(np.round(values, 1), index=dates.strftime('%Y-%m-%d'),
+                        columns=city_names(cities + nan_columns))
+    for column in temp.columns[cities:]:
+        temp.loc[temp.index[rng.integers(len(dates))], column] = np.nan
+    temp.index.name = 'Date'
+    temp.to_csv(path)
+
+
+def main() -> None:
+    """
+    generate the csv file from command line arguments
+    """
+    parser = argparse.ArgumentParser(description='Generate synthetic Japan temperature csv file')
+    parser.add_argument('path')
+    parser.add_argument('--cities', type=int, default=50)
+    parser.add_argument('--years', type=int, default=66)
+    parser.add_argument('--nan-columns', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+    generate(options.path, options.cities, options.years, options.nan_columns, seed=options.seed)
+
+
+if __name__ == '__main__':
+    main()
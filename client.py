@@ -0,0 +1,314 @@
+"""
+This module contains the thin client of the query server
+it has the same query methods as JapanTemperature so the UI can use either of them
+"""
+
+import gzip
+import json
+from http.client import HTTPConnection, HTTPException
+from threading import Lock
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from backend import CityNotFoundError
+from lru import LRUCache
+
+
+def decode_values(values: list) -> np.ndarray:
+    """convert json list into float array with NaN instead of null
+
+    Arguments:
+        values {list} -- values from the server
+
+    Returns:
+        np.ndarray -- float64 array
+    """
+    return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+
+def decode_dates(dates: list) -> pd.DatetimeIndex:
+    """convert number of days since 1970-01-01 into date index
+
+    Arguments:
+        dates {list} -- day number of every date
+
+    Returns:
+        pd.DatetimeIndex -- date index the same as the backend
+    """
+    return pd.DatetimeIndex(np.array(dates, dtype='datetime64[D]'), name='Date')
+
+
+def decode_series(payload: Dict) -> pd.Series:
+    """convert json object from the server into series
+
+    Arguments:
+        payload {Dict} -- name, dates (or index of statistic) and values
+
+    Returns:
+        pd.Series -- series indexed by date or by statistic
+    """
+    index = decode_dates(payload['dates']) if 'dates' in payload else payload['index']
+    return pd.Series(decode_values(payload['values']), index=index, name=payload['name'])
+
+
+class RemoteJapanTemperature:
+    """
+    JapanTemp Model that query the server instead of reading the dataset
+    """
+
+    def __init__(self, url: str, max_queries: int = 256, timeout: float = 30) -> None:
+        """Initialize the client, nothing is requested until _readfile
+
+        Arguments:
+            url {str} -- address of the server eg. http://127.0.0.1:8765
+
+        Keyword Arguments:
+            max_queries {int} -- number of query result kept in memory (default: {256})
+            timeout {float} -- second to wait for the server (default: {30})
+        """
+        parts = urlsplit(url)
+        self.__host = parts.hostname or '127.0.0.1'
+        self.__port = parts.port or 80
+        self.__timeout = timeout
+        self.__connection: Optional[HTTPConnection] = None
+        # one keep-alive connection is shared by the worker threads of the UI
+        self.__lock = Lock()
+        self.__queries = LRUCache(max_queries)
+        self.__city = pd.Index([])
+        self.__year = range(0)
+        self.__partial_years = ()
+
+    def _readfile(self, *args, progress: Optional[Callable[[int], None]] = None, **kwargs) -> None:
+        """
+        get city and year from the server, the arguments of JapanTemperature._readfile are ignored
+        because the server has already read the dataset
+        """
+        self.__queries.clear()
+        self.__city = pd.Index(self.__get('/city')['city'])
+        payload = self.__get('/year')
+        years = payload['year']
+        self.__year = range(years[0], years[-1] + 1) if years else range(0)
+        self.__partial_years = tuple(payload.get('partial', ()))
+
+    @property
+    def city(self) -> pd.core.indexes.base.Index:
+        """Get all city of dataframe
+
+        Returns:
+            pd.core.indexes.base.Index -- Series of Japanese city
+        """
+        return self.__city
+
+    @property
+    def year(self) -> range:
+        """get all year of data
+
+        Returns:
+            range -- empty range if data isn't read else a range of year in data
+        """
+        return self.__year
+
+    @property
+    def partial_years(self) -> Tuple[int, ...]:
+        """get the years that don't have every day in data
+
+        Returns:
+            Tuple[int, ...] -- year that has fewer rows than its number of day
+        """
+        return self.__partial_years
+
+    def get_temps(self, city: str) -> pd.Series:
+        """get the temperature of a city in Japan
+
+        Arguments:
+            city {str} -- a city in Japan
+
+        Raises:
+            TypeError: Raises if param city isn't a string it will raise
+            CityNotFoundError: Raises if city not in Japan or invlid city
+
+        Returns:
+            pd.Series -- a Series of Japanese Temperature of specific city in all date
+        """
+        if not isinstance(city, str):
+            raise TypeError('city must be a string')
+        return self.overall_mode(city)
+
+    def overall_mode(self, city: str) -> pd.Series:
+        """get the overall temperature of a city in Japan
+
+        Arguments:
+            city {str} -- a city in Japan
+
+        Returns:
+            pd.Series -- Series of Japanese Temperature of specific city in all date
+        """
+        return self.__series('/overall_mode', city=city)
+
+    def year_mode(self, city: str, year: int) -> pd.Series:
+        """get the temperature of a city in Japan in a specific year
+
+        Arguments:
+            city {str} -- specfic city in Japan
+            year {int} -- specific year in data
+
+        Returns:
+            pd.Series -- a series of Temperature filtered by city and year
+        """
+        return self.__series('/year_mode', city=city, year=int(year))
+
+    def month_mode(self, city: str, year: int, month: int) -> pd.Series:
+        """get the temperature of a city in Japan in a specific month
+
+        Arguments:
+            city {str} -- specfic city in Japan
+            year {int} -- specific year in data
+            month {int} -- specific month of selected year and city in data
+
+        Returns:
+            pd.Series -- a series of Temperature filtered by city and month
+        """
+        return self.__series('/month_mode', city=city, year=int(year), month=int(month))
+
+    def anomaly_mode(self, city: str, year: Optional[int] = None, month: Optional[int] = None) -> pd.Series:
+        """get the temperature of overall, year or month mode minus the climatology mean of each day
+
+        Arguments:
+            city {str} -- a city in Japan
+
+        Keyword Arguments:
+            year {Optional[int]} -- specific year, None for overall mode (default: {None})
+            month {Optional[int]} -- specific month of the year, None for year mode (default: {None})
+
+        Returns:
+            pd.Series -- a series of temperature anomaly of the selected data
+        """
+        return self.__series('/anomaly_mode', city=city, year=year, month=month)
+
+    def get_describe(self, data: pd.Series) -> pd.core.series.Series:
+        """get description of data that is already in client
+
+        Arguments:
+            data {pd.Series} -- series of Temperature
+
+        Returns:
+            pd.core.series.Series -- description of current data
+        """
+        # not include coount index
+        return data.describe()[1:]
+
+    def describe(self, city: str, year: Optional[int] = None, month: Optional[int] = None) -> pd.Series:
+        """get description of overall, year or month mode from the statistics of the server
+
+        Arguments:
+            city {str} -- a city in Japan
+
+        Keyword Arguments:
+            year {Optional[int]} -- specific year, None for overall mode (default: {None})
+            month {Optional[int]} -- specific month of the year, None for year mode (default: {None})
+
+        Returns:
+            pd.Series -- mean, std, min, every quartile and max of the selected data
+        """
+        return self.__series('/get_describe', city=city, year=year, month=month)
+
+    def query_cities(self, cities: Optional[Iterable[str]] = None, year: Optional[int] = None,
+                     month: Optional[int] = None, anomaly: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """get temperature and description of many city in one request
+
+        Keyword Arguments:
+            cities {Optional[Iterable[str]]} -- cities in Japan, None for every city (default: {None})
+            year {Optional[int]} -- specific year, None for overall mode (default: {None})
+            month {Optional[int]} -- specific month of the year, None for year mode (default: {None})
+            anomaly {bool} -- subtract the day of year climatology mean from the temperature (default: {False})
+
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame] -- date x city temperature and city x statistic description
+        """
+        names = '' if cities is None else ','.join(cities)
+        payload = self.__get('/query_cities', cities=names, year=year, month=month, anomaly=int(anomaly))
+        columns = payload['columns']
+        data = pd.DataFrame({city: decode_values(values) for city, values in zip(columns, payload['values'])},
+                            index=decode_dates(payload['dates']), columns=columns)
+        described = pd.DataFrame([decode_values(values) for values in payload['describe']],
+                                 index=columns, columns=payload['statistics'])
+        return data, described
+
+    def heatmap(self, year: Optional[int] = None, anomaly: bool = False) -> pd.DataFrame:
+        """get every city in one city x day matrix for drawing it as one image
+
+        Keyword Arguments:
+            year {Optional[int]} -- specific year, None for the day of year climatology mean (default: {None})
+            anomaly {bool} -- subtract the climatology mean from the temperature of the year (default: {False})
+
+        Returns:
+            pd.DataFrame -- city x date of the year (or city x day of year) temperature
+        """
+        key = ('/heatmap', year, anomaly)
+        result = self.__queries.get(key)
+        if result is None:
+            payload = self.__get('/heatmap', year=year, anomaly=int(anomaly))
+            columns = (decode_dates(payload['dates']) if 'dates' in payload
+                       else pd.RangeIndex(payload['days'][0], payload['days'][-1] + 1, name='day'))
+            result = pd.DataFrame(np.array([decode_values(row) for row in payload['values']]).reshape(-1, len(columns)),
+                                  index=payload['index'], columns=columns)
+            self.__queries.put(key, result)
+        return result
+
+    def __series(self, path: str, **params) -> pd.Series:
+        """get series from query cache or request it from the server
+
+        Arguments:
+            path {str} -- path of the endpoint
+
+        Returns:
+            pd.Series -- decoded series
+        """
+        key = (path, tuple(sorted(params.items())))
+        result = self.__queries.get(key)
+        if result is None:
+            result = decode_series(self.__get(path, **params))
+            self.__queries.put(key, result)
+        return result
+
+    def __get(self, path: str, **params) -> Dict:
+        """send GET request to the server and decode its json
+
+        Arguments:
+            path {str} -- path of the endpoint
+
+        Raises:
+            CityNotFoundError: Raises if server didn't find the city
+            ValueError: Raises if server rejected the arguments
+
+        Returns:
+            Dict -- decoded json
+        """
+        query = urlencode({name: value for name, value in params.items() if value is not None})
+        target = f'{path}?{query}' if query else path
+        with self.__lock:
+            for attempt in range(2):
+                if self.__connection is None:
+                    self.__connection = HTTPConnection(self.__host, self.__port, timeout=self.__timeout)
+                try:
+                    self.__connection.request('GET', target, headers={'Accept-Encoding': 'gzip'})
+                    response = self.__connection.getresponse()
+                    body = response.read()
+                    break
+                except (HTTPException, OSError):
+                    # server closed the keep-alive connection, open new one once
+                    self.__connection.close()
+                    self.__connection = None
+                    if attempt:
+                        raise
+        if response.getheader('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        payload = json.loads(body)
+        if response.status == 404 and payload.get('type') == 'CityNotFoundError':
+            raise CityNotFoundError(payload['error'])
+        if response.status != 200:
+            raise ValueError(payload.get('error', f'server answered {response.status}'))
+        return payload
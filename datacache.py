@@ -0,0 +1,248 @@
+"""
+This module contains the on-disk cache of the cleaned temperature data.
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import urllib.error
+import urllib.request
+from typing import IO, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# bump it whenever the cleaning step or the cache layout change
+CACHE_VERSION = 3
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'japantemp')
+# size of block that is hashed or copied at once when the file isn't read into memory
+BLOCK_SIZE = 1 << 20
+
+
+def is_url(source: str) -> bool:
+    """check whether source is a remote url or a local file
+
+    Arguments:
+        source {str} -- url or path of the csv file
+
+    Returns:
+        bool -- True if source is http(s) url else False
+    """
+    return source.startswith(('http://', 'https://'))
+
+
+def remote_validator(url: str, timeout: float = 5.0) -> Optional[str]:
+    """ask the server for ETag (or Last-Modified and Content-Length) without downloading the file
+
+    Arguments:
+        url {str} -- url of the csv file
+
+    Keyword Arguments:
+        timeout {float} -- timeout of the HEAD request in second (default: {5.0})
+
+    Returns:
+        Optional[str] -- validator of the remote file or None if server didn't give one
+    """
+    request = urllib.request.Request(url, method='HEAD')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            headers = response.headers
+    except (OSError, ValueError):
+        return None
+    if headers.get('ETag'):
+        return f'etag:{headers["ETag"]}'
+    if headers.get('Last-Modified') and headers.get('Content-Length'):
+        return f'modified:{headers["Last-Modified"]}:{headers["Content-Length"]}'
+    return None
+
+
+def open_source(source: str) -> IO[bytes]:
+    """open the csv file as binary stream so it can be read before it is fully downloaded
+
+    Arguments:
+        source {str} -- url or path of the csv file
+
+    Returns:
+        IO[bytes] -- binary stream of the file
+    """
+    if is_url(source):
+        return urllib.request.urlopen(source)
+    return open(source, 'rb')
+
+
+def fetch(source: str) -> bytes:
+    """download or read the raw csv file
+
+    Arguments:
+        source {str} -- url or path of the csv file
+
+    Returns:
+        bytes -- content of the file
+    """
+    with open_source(source) as stream:
+        return stream.read()
+
+
+def fetch_tail(source: str, offset: int) -> Optional[bytes]:
+    """read only the bytes after offset of the file that may have grown since it was read
+
+    Arguments:
+        source {str} -- url or path of the csv file
+        offset {int} -- number of bytes that were already read
+
+    Returns:
+        Optional[bytes] -- bytes after offset (empty if nothing is new)
+                           None if file became shorter or server doesn't support range request
+    """
+    if not is_url(source):
+        with open(source, 'rb') as stream:
+            if os.fstat(stream.fileno()).st_size < offset:
+                return None
+            stream.seek(offset)
+            return stream.read()
+    request = urllib.request.Request(source, headers={'Range': f'bytes={offset}-'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            # 200 mean the range was ignored and the whole file is sent
+            return response.read() if response.status == 206 else None
+    except urllib.error.HTTPError as error:
+        if error.code == 416:
+            # range start at the end of the file so there is nothing new
+            return b''
+        raise
+
+
+def content_hash(raw: bytes) -> str:
+    """hash the content of the file
+
+    Arguments:
+        raw {bytes} -- content of the file
+
+    Returns:
+        str -- fingerprint of the content
+    """
+    return f'sha256:{hashlib.sha256(raw).hexdigest()}'
+
+
+def spool(source: str, directory: str) -> Tuple[str, str]:
+    """hash the file block by block without reading it into memory,
+    remote file is copied into a temporary file while it is hashed so it is downloaded once
+
+    Arguments:
+        source {str} -- url or path of the csv file
+        directory {str} -- directory of the temporary file
+
+    Returns:
+        Tuple[str, str] -- path of the local file (a temporary file that caller has to
+                           remove if it isn't source) and fingerprint of the content
+    """
+    digest = hashlib.sha256()
+    if not is_url(source):
+        with open(source, 'rb') as stream:
+            for block in iter(lambda: stream.read(BLOCK_SIZE), b''):
+                digest.update(block)
+        return source, f'sha256:{digest.hexdigest()}'
+    os.makedirs(directory, exist_ok=True)
+    with open_source(source) as stream, tempfile.NamedTemporaryFile(
+            dir=directory, suffix='.csv.tmp', delete=False) as file:
+        try:
+            for block in iter(lambda: stream.read(BLOCK_SIZE), b''):
+                digest.update(block)
+                file.write(block)
+        except BaseException:
+            file.close()
+            os.remove(file.name)
+            raise
+    return file.name, f'sha256:{digest.hexdigest()}'
+
+
+def cache_path(source: str, cache_dir: str) -> str:
+    """get the path of cache file of the source
+
+    Arguments:
+        source {str} -- url or path of the csv file
+        cache_dir {str} -- directory that keep the cache
+
+    Returns:
+        str -- path of the cache file
+    """
+    name = hashlib.sha1(source.encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f'{name}.npz')
+
+
+def open_cache(path: str, fingerprint: str) -> Optional[np.lib.npyio.NpzFile]:
+    """open the cache without reading any city, array is read only when it is accessed
+
+    Arguments:
+        path {str} -- path of the cache file
+        fingerprint {str} -- fingerprint of the current source
+
+    Returns:
+        Optional[np.lib.npyio.NpzFile] -- opened cache or None if cache is missing or out of date
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        npz = np.load(path, allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+    try:
+        meta = json.loads(str(npz['meta']))
+        if meta['version'] == CACHE_VERSION and meta['fingerprint'] == fingerprint:
+            return npz
+    except (OSError, ValueError, KeyError):
+        pass
+    npz.close()
+    return None
+
+
+def read_cache(path: str, fingerprint: str) -> Optional[pd.DataFrame]:
+    """read the cleaned DataFrame back from cache
+
+    Arguments:
+        path {str} -- path of the cache file
+        fingerprint {str} -- fingerprint of the current source
+
+    Returns:
+        Optional[pd.DataFrame] -- cleaned DataFrame or None if cache is missing or out of date
+    """
+    npz = open_cache(path, fingerprint)
+    if npz is None:
+        return None
+    try:
+        with npz:
+            # every city is its own array in the archive (columnar)
+            columns = {city: npz[f'c{i}']
+                       for i, city in enumerate(npz['cities'].tolist())}
+            dates = npz['dates']
+    except (OSError, ValueError, KeyError):
+        return None
+    return pd.DataFrame(columns, index=pd.DatetimeIndex(dates, name='Date'))
+
+
+def write_cache(path: str, temp: pd.DataFrame, fingerprint: str) -> None:
+    """write the cleaned DataFrame into cache
+
+    Arguments:
+        path {str} -- path of the cache file
+        temp {pd.DataFrame} -- cleaned DataFrame
+        fingerprint {str} -- fingerprint of the source of temp
+    """
+    meta = json.dumps({'version': CACHE_VERSION, 'fingerprint': fingerprint})
+    columns = {f'c{i}': temp[city].to_numpy()
+               for i, city in enumerate(temp.columns)}
+    buffer = io.BytesIO()
+    np.savez(buffer, meta=np.array(meta), cities=np.array(temp.columns, dtype=str),
+             dates=temp.index.values.astype('datetime64[ns]'), **columns)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # write then rename so other process never see a half written cache
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+    except OSError:
+        # cache is only an optimization, reading can go on without it
+        pass
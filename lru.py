@@ -0,0 +1,107 @@
+"""
+This module contains the bounded least recently used cache.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class LRUCache:
+    """
+    Mapping that keep only the most recently used items
+    the least recently used item is evicted when it is full
+    """
+
+    def __init__(self, maxsize: int, sizeof: Optional[Callable[[Any], int]] = None) -> None:
+        """Initialize the cache
+
+        Arguments:
+            maxsize {int} -- maximum number of items in the cache
+                             or maximum total size of them if sizeof is given
+
+        Keyword Arguments:
+            sizeof {Optional[Callable[[Any], int]]} -- size of an item eg. bytes of memory,
+                                                       None to count every item as 1 (default: {None})
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.__sizeof = sizeof or (lambda value: 1)
+        self.__total = 0
+        self.__items = OrderedDict()
+        # UI read data from worker thread while another one may be plotting
+        self.__lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """get the item and mark it as recently used
+
+        Arguments:
+            key {Hashable} -- key of the item
+
+        Keyword Arguments:
+            default {Any} -- value returned if key isn't in cache (default: {None})
+
+        Returns:
+            Any -- the cached item or default
+        """
+        with self.__lock:
+            if key not in self.__items:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self.__items.move_to_end(key)
+            return self.__items[key][0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """put the item into cache and evict the least recently used one if cache is full
+
+        Arguments:
+            key {Hashable} -- key of the item
+            value {Any} -- item to be cached
+        """
+        size = self.__sizeof(value)
+        with self.__lock:
+            if key in self.__items:
+                self.__total -= self.__items[key][1]
+            self.__items[key] = (value, size)
+            self.__items.move_to_end(key)
+            self.__total += size
+            # item larger than the whole cache is evicted right away
+            while self.__total > self.maxsize:
+                _, (_, evicted) = self.__items.popitem(last=False)
+                self.__total -= evicted
+
+    def values(self) -> List[Any]:
+        """get every cached item without marking them as used
+
+        Returns:
+            List[Any] -- items from the least to the most recently used
+        """
+        with self.__lock:
+            return [value for value, _ in self.__items.values()]
+
+    def clear(self) -> None:
+        """
+        remove every item from cache
+        """
+        with self.__lock:
+            self.__items.clear()
+            self.__total = 0
+
+    def info(self) -> Dict[str, int]:
+        """get the statistics of the cache
+
+        Returns:
+            Dict[str, int] -- number of hits, misses and items, current total size and maximum size
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'items': len(self.__items),
+                'size': self.__total, 'maxsize': self.maxsize}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__items
+
+    def __len__(self) -> int:
+        return len(self.__items)
@@ -1,12 +1,42 @@
 """
 This is main file for Japan City Temperature Analyis Project
 by Preawpan Thamapipol
+
+usage: python main.py                                  read the dataset in this process
+       python main.py --server http://127.0.0.1:8765   query the dataset from server.py
+       python main.py --startup-report                 print time of every startup stage
 """
 
-from backend import JapanTemperature
+from startup import startup  # isort:skip (the clock start when it is imported)
+
+import argparse
+
 from JapanTempUI import JapanTempReportUI
 
+
+def create_database(server: str = None):
+    """create the model, it is called in the reading task of the UI after the window is shown
+
+    Keyword Arguments:
+        server {str} -- url of the query server, None to read the dataset locally (default: {None})
+
+    Returns:
+        JapanTemperature or RemoteJapanTemperature -- the model
+    """
+    if server:
+        from client import RemoteJapanTemperature
+        return RemoteJapanTemperature(server)
+    from backend import JapanTemperature
+    return JapanTemperature()
+
+
 if __name__ == '__main__':
-    database = JapanTemperature()
-    ui = JapanTempReportUI(database)
+    parser = argparse.ArgumentParser(description='Japan City Temperature Analysis')
+    parser.add_argument('--server', help='url of the query server, the dataset is read locally if omitted')
+    parser.add_argument('--startup-report', action='store_true',
+                        help='print time of import, first paint, canvas and data since start')
+    options = parser.parse_args()
+    startup.enabled = options.startup_report
+    startup.mark('import')
+    ui = JapanTempReportUI(lambda: create_database(options.server))
     ui.run()
@@ -0,0 +1,485 @@
+"""
+This module contains the plotting helper that shared by the UI and other frontend.
+"""
+
+from typing import Any, List, Optional, Tuple
+
+import matplotlib.dates as mdates
+import numpy as np
+import pandas as pd
+from matplotlib.artist import Artist
+from matplotlib.axes import Axes
+from matplotlib.backend_bases import FigureCanvasBase
+from matplotlib.image import AxesImage
+from matplotlib.legend import Legend
+from matplotlib.lines import Line2D
+
+from tracing import tracer
+
+
+MODES = ('overall', 'year', 'month')
+# every city as one image instead of one line per city
+HEATMAP = 'heatmap'
+MAX_CITY_TICKS = 40
+TITLES = {'overall': 'Japanese Temperature over time (Comparing Mode)',
+          'year': 'Japanese Temperature over year (Comparing Mode)',
+          'month': 'Japanese Temperature over month in days (Comparing Mode)'}
+
+
+def plot_title(mode: str, city: str, year: str = '', month: str = '', compare: bool = True,
+               anomaly: bool = False) -> str:
+    """get title of the plot
+
+    Arguments:
+        mode {str} -- 'overall', 'year' or 'month'
+        city {str} -- plotted city
+
+    Keyword Arguments:
+        year {str} -- selected year (default: {''})
+        month {str} -- selected month (default: {''})
+        compare {bool} -- title for axes that may hold many city (default: {True})
+        anomaly {bool} -- title for temperature minus climatology (default: {False})
+
+    Returns:
+        str -- title of the plot
+    """
+    quantity = 'Temperature Anomaly' if anomaly else 'Temperature'
+    if mode == HEATMAP:
+        if not year:
+            return 'Japanese Temperature of every city by day of year (mean of every year)'
+        return f'Japanese {quantity} of every city at {year}'
+    if compare:
+        return TITLES[mode].replace('Temperature', quantity)
+    title = f'{city} {quantity}'
+    if mode in ('year', 'month'):
+        title += f' at {year}'
+    if mode == 'month':
+        title += f' between {month}'
+    return title
+
+
+def plot_label(mode: str, city: str, year: str = '', month: str = '', anomaly: bool = False) -> str:
+    """get label of the line in legend, it is also used to check duplicated plot
+
+    Arguments:
+        mode {str} -- 'overall', 'year' or 'month'
+        city {str} -- plotted city
+
+    Keyword Arguments:
+        year {str} -- selected year (default: {''})
+        month {str} -- selected month (default: {''})
+        anomaly {bool} -- label for temperature minus climatology (default: {False})
+
+    Returns:
+        str -- label of the line
+    """
+    quantity = 'Temperature Anomaly' if anomaly else 'Temperature'
+    if mode == 'overall':
+        return f'{city} Overall {quantity}'
+    return f'{city} {year} {month} {quantity}'
+
+
+def query(database, mode: str, city: str, year: str = '', month: str = '',
+          anomaly: bool = False) -> Tuple[pd.Series, pd.Series]:
+    """get data and its description of the selected mode from database
+
+    Arguments:
+        database {JapanTemperature} -- model from the backend
+        mode {str} -- 'overall', 'year' or 'month'
+        city {str} -- selected city
+
+    Keyword Arguments:
+        year {str} -- selected year (default: {''})
+        month {str} -- selected month (default: {''})
+        anomaly {bool} -- subtract the day of year climatology from the data (default: {False})
+
+    Raises:
+        CityNotFoundError: Raises if city not in Japan or invlid city
+        ValueError: Raises if year or month isn't selected
+
+    Returns:
+        Tuple[pd.Series, pd.Series] -- data to be plotted and its description
+    """
+    if anomaly:
+        with tracer.span('slice', mode=mode, anomaly=True):
+            if mode == 'overall':
+                data = database.anomaly_mode(city)
+            elif mode == 'year':
+                data = database.anomaly_mode(city, int(year))
+            else:
+                data = database.anomaly_mode(city, int(year), month)
+        with tracer.span('describe', mode=mode, anomaly=True):
+            return data, database.get_describe(data)
+
+    with tracer.span('slice', mode=mode):
+        if mode == 'overall':
+            data = database.overall_mode(city)
+        elif mode == 'year':
+            data = database.year_mode(city, int(year))
+        else:
+            data = database.month_mode(city, int(year), month)
+    with tracer.span('describe', mode=mode):
+        if mode == 'overall':
+            described = database.describe(city)
+        elif mode == 'year':
+            described = database.describe(city, int(year))
+        else:
+            described = database.describe(city, int(year), month)
+    return data, described
+
+
+def query_many(database, mode: str, cities: Optional[List[str]], year: str = '', month: str = '',
+               anomaly: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """get data and description of many city of the selected mode in one query
+
+    Arguments:
+        database {JapanTemperature} -- model from the backend
+        mode {str} -- 'overall', 'year' or 'month'
+        cities {Optional[List[str]]} -- selected cities, None for every city
+
+    Keyword Arguments:
+        year {str} -- selected year (default: {''})
+        month {str} -- selected month (default: {''})
+        anomaly {bool} -- subtract the day of year climatology from the data (default: {False})
+
+    Raises:
+        CityNotFoundError: Raises if any city not in Japan or invlid city
+        ValueError: Raises if year or month isn't selected
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame] -- date x city data and city x statistic description
+    """
+    with tracer.span('slice', mode=mode, cities=len(cities) if cities is not None else -1):
+        if mode == 'overall':
+            return database.query_cities(cities, anomaly=anomaly)
+        if mode == 'year':
+            return database.query_cities(cities, int(year), anomaly=anomaly)
+        return database.query_cities(cities, int(year), month, anomaly=anomaly)
+
+
+def query_heatmap(database, year: str = '', anomaly: bool = False) -> pd.DataFrame:
+    """get every city of the year (or the day of year climatology) as one matrix
+
+    Arguments:
+        database {JapanTemperature} -- model from the backend
+
+    Keyword Arguments:
+        year {str} -- selected year, empty for climatology (default: {''})
+        anomaly {bool} -- subtract the day of year climatology from the data (default: {False})
+
+    Returns:
+        pd.DataFrame -- city x day matrix
+    """
+    with tracer.span('slice', mode=HEATMAP):
+        return database.heatmap(int(year) if year else None, anomaly)
+
+
+def draw_heatmap(ax: Axes, data: pd.DataFrame, title: str, image: Optional[AxesImage] = None,
+                 anomaly: bool = False) -> AxesImage:
+    """draw city x day matrix as one image or put it into the image that already drawn
+
+    Arguments:
+        ax {Axes} -- axes to be drawn in
+        data {pd.DataFrame} -- city x day matrix from query_heatmap
+        title {str} -- title of the axes
+
+    Keyword Arguments:
+        image {Optional[AxesImage]} -- image to be reused, None to draw new image (default: {None})
+        anomaly {bool} -- use diverging colormap centered at zero (default: {False})
+
+    Returns:
+        AxesImage -- the drawn image
+    """
+    values = data.to_numpy()
+    rows, columns = values.shape
+    # pixel centers are at day 1..columns and city 0..rows - 1
+    extent = (0.5, columns + 0.5, rows - 0.5, -0.5)
+    if anomaly:
+        limit = np.nanmax(np.abs(values)) if values.size else 1
+        limits = (-limit, limit)
+    else:
+        limits = (np.nanmin(values), np.nanmax(values)) if values.size else (0, 1)
+    if image is None:
+        image = ax.imshow(values, aspect='auto', interpolation='nearest', extent=extent)
+    else:
+        image.set_data(values)
+        image.set_extent(extent)
+    image.set_cmap('coolwarm' if anomaly else 'inferno')
+    image.set_clim(*limits)
+
+    step = max(-(-rows // MAX_CITY_TICKS), 1)
+    ax.set_yticks(range(0, rows, step))
+    ax.set_yticklabels(list(data.index[::step]))
+    ax.set_xlabel('day' if isinstance(data.columns, pd.DatetimeIndex) else 'day of year')
+    ax.set_ylabel('')
+    ax.set_title(title)
+    return image
+
+
+def draw_series(ax: Axes, lod: 'LevelOfDetail', mode: str, data: pd.Series,
+                label: str, title: str, line: Optional[Line2D] = None) -> Line2D:
+    """plot data of the mode into axes or put it into the line that already plotted
+
+    Arguments:
+        ax {Axes} -- axes to be plotted in
+        lod {LevelOfDetail} -- decimate the long series of overall mode
+        mode {str} -- 'overall', 'year' or 'month'
+        data {pd.Series} -- data from query
+        label {str} -- label of the line
+        title {str} -- title of the axes
+
+    Keyword Arguments:
+        line {Optional[Line2D]} -- line to be reused, None to plot new line (default: {None})
+
+    Returns:
+        Line2D -- the plotted line
+    """
+    if mode == 'overall':
+        # long series is decimated to the width of canvas
+        if line is None:
+            line = lod.plot(data)
+        else:
+            lod.update(line, data)
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Temperature')
+    else:
+        days = np.arange(1, len(data) + 1)
+        if line is None:
+            line, = ax.plot(days, data.to_numpy())
+        else:
+            line.set_data(days, data.to_numpy())
+        ax.set_xlabel('day')
+        ax.set_ylabel('Temperature (℃)')
+    line.set_label(label)
+    ax.set_title(title)
+    ax.grid(True)
+    return line
+
+
+def minmax_decimate(x: np.ndarray, y: np.ndarray, buckets: int) -> Tuple[np.ndarray, np.ndarray]:
+    """keep only minimum and maximum point of every bucket so the envelope of line looks the same
+
+    Arguments:
+        x {np.ndarray} -- sorted x of every point
+        y {np.ndarray} -- y of every point
+        buckets {int} -- number of bucket, usually width of axes in pixel
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray] -- x and y of at most 2 * buckets + 2 points in original order
+    """
+    length = len(y)
+    if buckets < 1 or length <= 2 * buckets:
+        return x, y
+    size = -(-length // buckets)
+    count = -(-length // size)
+    # pad the last bucket so every bucket has the same size then reduce all of them at once
+    low = np.full(count * size, np.inf)
+    high = np.full(count * size, -np.inf)
+    low[:length] = y
+    high[:length] = y
+    start = np.arange(count) * size
+    keep = np.concatenate(([0, length - 1],
+                           start + low.reshape(count, size).argmin(axis=1),
+                           start + high.reshape(count, size).argmax(axis=1)))
+    keep = np.unique(keep)
+    return x[keep], y[keep]
+
+
+class LevelOfDetail:
+    """
+    Plot long series into axes as decimated line
+    and decimate them again from the full data when axes is zoomed or resized
+    """
+
+    def __init__(self, ax: Axes) -> None:
+        """Initialize and listen to the x limit of axes
+
+        Arguments:
+            ax {Axes} -- axes that line will be plotted in
+        """
+        self.ax = ax
+        self.__lines: List[Tuple[Line2D, np.ndarray, np.ndarray]] = []
+        # index of the last plotted series and its date number
+        self.__x: Tuple[Optional[pd.Index], Optional[np.ndarray]] = (None, None)
+        self.__callbacks = None
+        self.__callback = None
+        self.clear()
+
+    def plot(self, data: pd.Series, **kwargs) -> Line2D:
+        """plot the series that indexed by date as decimated line
+
+        Arguments:
+            data {pd.Series} -- series to be plotted
+
+        Returns:
+            Line2D -- the plotted line
+        """
+        x, y = self.__full(data)
+        line, = self.ax.plot(*minmax_decimate(x, y, self.__buckets()), **kwargs)
+        self.ax.xaxis_date()
+        self.__lines.append((line, x, y))
+        return line
+
+    def update(self, line: Line2D, data: pd.Series) -> Line2D:
+        """replace data of the line that plotted by this object in place
+
+        Arguments:
+            line {Line2D} -- line that was returned from plot
+            data {pd.Series} -- new series of the line
+
+        Returns:
+            Line2D -- the same line
+        """
+        x, y = self.__full(data)
+        self.__lines = [(each, x, y) if each is line else (each, each_x, each_y)
+                        for each, each_x, each_y in self.__lines]
+        line.set_data(*minmax_decimate(x, y, self.__buckets()))
+        return line
+
+    def __full(self, data: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """convert the series into x and y in full resolution,
+        x of the last index is kept because every city of one query share the same dates
+
+        Arguments:
+            data {pd.Series} -- series that indexed by date
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray] -- date number and value of every point
+        """
+        index, x = self.__x
+        if index is not data.index and not data.index.equals(index):
+            # datetime64 is converted at once, to_pydatetime build one object per point
+            x = mdates.date2num(data.index.values)
+            self.__x = data.index, x
+        return x, data.to_numpy(dtype=np.float64)
+
+    def refresh(self, *args) -> None:
+        """
+        decimate every line again for the current x limit and width of axes
+        """
+        left, right = sorted(self.ax.get_xlim())
+        buckets = self.__buckets()
+        for line, x, y in self.__lines:
+            # one point outside each side so the line still reach the edge
+            start = max(np.searchsorted(x, left) - 1, 0)
+            stop = np.searchsorted(x, right) + 1
+            line.set_data(*minmax_decimate(x[start:stop], y[start:stop], buckets))
+
+    def clear(self) -> None:
+        """
+        forget every line, it has to be called after axes is cleared
+        because clearing axes also remove the callback
+        """
+        self.__lines.clear()
+        if self.__callbacks is self.ax.callbacks:
+            self.ax.callbacks.disconnect(self.__callback)
+        self.__callbacks = self.ax.callbacks
+        self.__callback = self.ax.callbacks.connect('xlim_changed', self.refresh)
+
+    def __buckets(self) -> int:
+        """number of bucket that decimate into
+
+        Returns:
+            int -- width of axes in pixel
+        """
+        return max(int(self.ax.bbox.width), 1)
+
+
+class BlitManager:
+    """
+    Keep the plotted lines and legend as animated artist over a cached background
+    so changing them only repaint the artists instead of the whole figure
+    """
+
+    def __init__(self, canvas: FigureCanvasBase) -> None:
+        """Initialize and listen to every full draw of canvas
+
+        Arguments:
+            canvas {FigureCanvasBase} -- canvas of the figure
+        """
+        self.canvas = canvas
+        self.__background = None
+        self.__artists: List[Artist] = []
+        self.__legend: Optional[Legend] = None
+        canvas.mpl_connect('draw_event', self.on_draw)
+
+    def add(self, artist: Artist) -> None:
+        """draw the artist by this manager instead of the figure
+
+        Arguments:
+            artist {Artist} -- artist that will be changed often, usually a line
+        """
+        if artist not in self.__artists:
+            artist.set_animated(True)
+            self.__artists.append(artist)
+
+    def set_legend(self, legend: Legend) -> None:
+        """replace the legend, axes create new legend every time that it is called
+
+        Arguments:
+            legend {Legend} -- the new legend
+        """
+        legend.set_animated(True)
+        self.__legend = legend
+
+    def clear(self) -> None:
+        """
+        forget every artist, it has to be called after axes is cleared
+        """
+        self.__artists.clear()
+        self.__legend = None
+
+    def on_draw(self, event) -> None:
+        """cache the background that just drawn then draw the artists over it
+
+        Arguments:
+            event {DrawEvent} -- draw event of canvas
+        """
+        self.__background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self.__draw_artists()
+
+    def update(self, full: bool = False) -> None:
+        """show the change of artists on canvas
+
+        Keyword Arguments:
+            full {bool} -- whether something other than the artists changed eg. axes limit
+                           then the whole figure has to be drawn (default: {False})
+        """
+        if full or self.__background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.__background)
+        self.__draw_artists()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def snapshot(self) -> Tuple[Any, Any, int]:
+        """copy what canvas show now and the background under the artists
+
+        Returns:
+            Tuple[Any, Any, int] -- frame and background region and their bytes of memory
+        """
+        width, height = self.canvas.get_width_height(physical=True)
+        # each region is one RGBA pixel of 4 bytes for every pixel of canvas
+        return self.canvas.copy_from_bbox(self.canvas.figure.bbox), self.__background, 2 * 4 * width * height
+
+    def restore(self, frame: Any, background: Any) -> None:
+        """show the frame that copied by snapshot without drawing anything,
+        the figure has to be in the same state as when it was copied
+
+        Arguments:
+            frame {Any} -- region of the whole canvas from snapshot
+            background {Any} -- background region from snapshot, used by the next update
+        """
+        self.__background = background
+        self.canvas.restore_region(frame)
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def __draw_artists(self) -> None:
+        """
+        draw every artist into the canvas
+        """
+        figure = self.canvas.figure
+        for artist in self.__artists:
+            figure.draw_artist(artist)
+        if self.__legend is not None:
+            figure.draw_artist(self.__legend)
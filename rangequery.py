@@ -0,0 +1,195 @@
+"""
+This module contains the range query index of the day x city matrix
+that answer mean, min and max of any span of days without reducing the span.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+BLOCK = 64
+
+
+class RangeQueryIndex:
+    """
+    Prefix sums for mean and rolling mean of any span in O(1)
+    and sparse table over blocks of rows for min and max, a span is answered by
+    at most two blocks that scanned directly and two overlapping entries of the table
+    """
+
+    def __init__(self, matrix: np.ndarray, block: int = BLOCK) -> None:
+        """Build the prefix sums and the sparse table of every city at once
+
+        Arguments:
+            matrix {np.ndarray} -- day x city matrix of temperature
+
+        Keyword Arguments:
+            block {int} -- number of row in one block of the sparse table (default: {BLOCK})
+        """
+        self.matrix = matrix
+        self.block = block
+        missing = np.isnan(matrix)
+        # prefix[i] is the sum of rows before i so sum of [start, stop) is prefix[stop] - prefix[start]
+        self.__prefix = np.zeros((len(matrix) + 1, matrix.shape[1]))
+        np.cumsum(np.where(missing, 0, matrix), axis=0, out=self.__prefix[1:])
+        self.__counts = None
+        if missing.any():
+            self.__counts = np.zeros(self.__prefix.shape, dtype=np.int64)
+            np.cumsum(~missing, axis=0, out=self.__counts[1:])
+
+        # level k hold min and max of 2 ** k blocks starting at each block
+        blocks = -(-len(matrix) // block)
+        padded = np.full((blocks * block, matrix.shape[1]), np.nan)
+        padded[:len(matrix)] = matrix
+        padded = padded.reshape(blocks, block, -1)
+        # fmin and fmax ignore NaN (and the padding) unless every value is NaN
+        self.__low = [np.fmin.reduce(padded, axis=1)]
+        self.__high = [np.fmax.reduce(padded, axis=1)]
+        width = 1
+        while width * 2 <= blocks:
+            low, high = self.__low[-1], self.__high[-1]
+            self.__low.append(np.fmin(low[:-width], low[width:]))
+            self.__high.append(np.fmax(high[:-width], high[width:]))
+            width *= 2
+
+    @property
+    def nbytes(self) -> int:
+        """get bytes of memory of the prefix sums and the sparse table, the matrix isn't counted
+
+        Returns:
+            int -- bytes of every array that built by the index
+        """
+        arrays = [self.__prefix, *self.__low, *self.__high]
+        if self.__counts is not None:
+            arrays.append(self.__counts)
+        return sum(array.nbytes for array in arrays)
+
+    def count(self, start: int, stop: int) -> np.ndarray:
+        """get number of value that isn't NaN in rows [start, stop) of every city
+
+        Arguments:
+            start {int} -- first row
+            stop {int} -- row after the last one
+
+        Returns:
+            np.ndarray -- count of every city
+        """
+        start, stop = self.__clip(start, stop)
+        if self.__counts is None:
+            return np.full(self.matrix.shape[1], stop - start)
+        return self.__counts[stop] - self.__counts[start]
+
+    def mean(self, start: int, stop: int) -> np.ndarray:
+        """get mean of rows [start, stop) of every city
+
+        Arguments:
+            start {int} -- first row
+            stop {int} -- row after the last one
+
+        Returns:
+            np.ndarray -- mean of every city, NaN if the span is empty
+        """
+        count = self.count(start, stop)
+        start, stop = self.__clip(start, stop)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, (self.__prefix[stop] - self.__prefix[start]) / count, np.nan)
+
+    def min(self, start: int, stop: int) -> np.ndarray:
+        """get minimum of rows [start, stop) of every city
+
+        Arguments:
+            start {int} -- first row
+            stop {int} -- row after the last one
+
+        Returns:
+            np.ndarray -- minimum of every city, NaN if the span is empty
+        """
+        return self.__reduce(start, stop, self.__low, np.fmin)
+
+    def max(self, start: int, stop: int) -> np.ndarray:
+        """get maximum of rows [start, stop) of every city
+
+        Arguments:
+            start {int} -- first row
+            stop {int} -- row after the last one
+
+        Returns:
+            np.ndarray -- maximum of every city, NaN if the span is empty
+        """
+        return self.__reduce(start, stop, self.__high, np.fmax)
+
+    def rolling_mean(self, window: int, column: Optional[int] = None) -> np.ndarray:
+        """get mean of the window that end at every row from the prefix sums
+
+        Arguments:
+            window {int} -- number of row in the window
+
+        Keyword Arguments:
+            column {Optional[int]} -- position of the only city to be computed, None for every city (default: {None})
+
+        Raises:
+            ValueError: Raises if window is less than 1
+
+        Returns:
+            np.ndarray -- day x city matrix (or day array of the column), NaN for the rows
+                          before the first full window the same as pd.DataFrame.rolling(window).mean()
+        """
+        if window < 1:
+            raise ValueError('window must be at least 1')
+        columns = slice(None) if column is None else column
+        prefix = self.__prefix[:, columns]
+        result = np.full((len(self.matrix), *prefix.shape[1:]), np.nan)
+        if window > len(self.matrix):
+            return result
+        sums = prefix[window:] - prefix[:-window]
+        if self.__counts is None:
+            result[window - 1:] = sums / window
+        else:
+            counts = self.__counts[window:, columns] - self.__counts[:-window, columns]
+            # a window that contain NaN has no mean just like pandas
+            result[window - 1:] = np.where(counts == window, sums / window, np.nan)
+        return result
+
+    def __clip(self, start: int, stop: int) -> Tuple[int, int]:
+        """keep the span inside the matrix
+
+        Arguments:
+            start {int} -- first row
+            stop {int} -- row after the last one
+
+        Returns:
+            Tuple[int, int] -- clipped start and stop, start is never after stop
+        """
+        start = min(max(int(start), 0), len(self.matrix))
+        return start, min(max(int(stop), start), len(self.matrix))
+
+    def __reduce(self, start: int, stop: int, table: list, combine: np.ufunc) -> np.ndarray:
+        """reduce rows [start, stop) by scanning the partial blocks and looking the whole blocks up
+
+        Arguments:
+            start {int} -- first row
+            stop {int} -- row after the last one
+            table {list} -- sparse table of min or max
+            combine {np.ufunc} -- np.fmin or np.fmax that ignore NaN
+
+        Returns:
+            np.ndarray -- reduced value of every city, NaN if the span is empty
+        """
+        start, stop = self.__clip(start, stop)
+        result = np.full(self.matrix.shape[1], np.nan)
+        first = -(-start // self.block)
+        last = stop // self.block
+        if first >= last:
+            # span doesn't cover a whole block so it is short enough to scan
+            if stop > start:
+                result = combine.reduce(self.matrix[start:stop], axis=0)
+            return result
+        head = self.matrix[start:first * self.block]
+        tail = self.matrix[last * self.block:stop]
+        for part in (head, tail):
+            if len(part):
+                result = combine(result, combine.reduce(part, axis=0))
+        # two power of two runs of blocks that overlap cover the whole blocks exactly
+        level = (last - first).bit_length() - 1
+        result = combine(result, table[level][first])
+        return combine(result, table[level][last - (1 << level)])
@@ -0,0 +1,56 @@
+"""
+This module contains the search index of the city name.
+"""
+
+from typing import Dict, Iterable, List, Set
+
+GRAM = 3
+
+
+class CitySearchIndex:
+    """
+    Case insensitive substring search over city names
+    it use trigram index for the first keystrokes and narrow the previous matches
+    when the new query extend the previous one
+    """
+
+    def __init__(self, cities: Iterable[str]) -> None:
+        """Initialize the index
+
+        Arguments:
+            cities {Iterable[str]} -- every city name
+        """
+        self.cities = list(cities)
+        self.__lower = [city.lower() for city in self.cities]
+        self.__grams: Dict[str, Set[int]] = {}
+        for i, name in enumerate(self.__lower):
+            for start in range(len(name) - GRAM + 1):
+                self.__grams.setdefault(name[start:start + GRAM], set()).add(i)
+        self.__query = ''
+        self.__matches = list(range(len(self.cities)))
+
+    def search(self, text: str) -> List[str]:
+        """find every city that contain text
+
+        Arguments:
+            text {str} -- text that user typed
+
+        Returns:
+            List[str] -- matched city in original order, every city if text is empty
+        """
+        query = text.lower()
+        if not query:
+            candidates = range(len(self.cities))
+        elif self.__query and self.__query in query:
+            # anything that contain the new query also contain the previous one
+            candidates = self.__matches
+        elif len(query) >= GRAM:
+            postings = sorted((self.__grams.get(query[start:start + GRAM], set())
+                               for start in range(len(query) - GRAM + 1)), key=len)
+            candidates = sorted(set.intersection(*postings))
+        else:
+            candidates = range(len(self.cities))
+
+        self.__query = query
+        self.__matches = [i for i in candidates if query in self.__lower[i]]
+        return [self.cities[i] for i in self.__matches]
@@ -0,0 +1,357 @@
+"""
+This is the query server of Japan City Temperature Analyis Project
+it read the dataset once then answer the queries of many thin client over local HTTP/JSON
+so every user doesn't have to load the whole dataset
+
+usage: python server.py --port 8765
+then:  python main.py --server http://127.0.0.1:8765
+
+every endpoint is GET and take its arguments from query string eg.
+    /city
+    /year
+    /overall_mode?city=Tokyo
+    /year_mode?city=Tokyo&year=2000
+    /month_mode?city=Tokyo&year=2000&month=2
+    /anomaly_mode?city=Tokyo&year=2000
+    /get_describe?city=Tokyo&year=2000&month=2
+    /query_cities?cities=Tokyo,Osaka&year=2000&anomaly=1
+    /heatmap?year=2000&anomaly=1
+series is sent as {"name", "dates", "values"} where dates are days since 1970-01-01
+and NaN is sent as null
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from backend import FILEPATH, CityNotFoundError, JapanTemperature
+from datacache import CACHE_DIR
+from lru import LRUCache
+
+HOST = '127.0.0.1'
+PORT = 8765
+MAX_HEADERS = 100
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+def encode_values(values: np.ndarray) -> List[Optional[float]]:
+    """convert array into json list with null instead of NaN
+
+    Arguments:
+        values {np.ndarray} -- array of float
+
+    Returns:
+        List[Optional[float]] -- values that can be dumped as standard json
+    """
+    return [None if value != value else value for value in np.asarray(values, dtype=np.float64).tolist()]
+
+
+def encode_dates(index: pd.Index) -> List[int]:
+    """convert date index into number of days since 1970-01-01
+
+    Arguments:
+        index {pd.Index} -- DatetimeIndex of the data
+
+    Returns:
+        List[int] -- day number of every date
+    """
+    return np.asarray(index.values, dtype='datetime64[D]').astype(np.int64).tolist()
+
+
+def encode_series(series: pd.Series) -> Dict:
+    """convert series from backend into json object
+
+    Arguments:
+        series {pd.Series} -- series indexed by date or by statistic
+
+    Returns:
+        Dict -- name, dates (or index of statistic) and values
+    """
+    payload = {'name': series.name, 'values': encode_values(series.to_numpy())}
+    if isinstance(series.index, pd.DatetimeIndex):
+        payload['dates'] = encode_dates(series.index)
+    else:
+        payload['index'] = [str(key) for key in series.index]
+    return payload
+
+
+class QueryServer:
+    """
+    asyncio HTTP server that answer the queries from one JapanTemperature
+    the queries run in the default thread pool so slow one doesn't block the others
+    and encoded responses are kept in LRU cache
+    """
+
+    def __init__(self, database: JapanTemperature, max_responses: int = 1024) -> None:
+        """Initialize the server
+
+        Arguments:
+            database {JapanTemperature} -- model that is already read
+
+        Keyword Arguments:
+            max_responses {int} -- number of encoded response kept in cache (default: {1024})
+        """
+        self.database = database
+        self.__responses = LRUCache(max_responses)
+        self.__routes: Dict[str, Callable[[Dict[str, str]], Dict]] = {
+            '/city': self.__city,
+            '/year': self.__year,
+            '/overall_mode': self.__overall_mode,
+            '/year_mode': self.__year_mode,
+            '/month_mode': self.__month_mode,
+            '/anomaly_mode': self.__anomaly_mode,
+            '/get_describe': self.__describe,
+            '/query_cities': self.__query_cities,
+            '/heatmap': self.__heatmap,
+        }
+
+    async def serve(self, host: str = HOST, port: int = PORT) -> None:
+        """accept the connections until the task is cancelled
+
+        Keyword Arguments:
+            host {str} -- address to listen on (default: {HOST})
+            port {int} -- port to listen on (default: {PORT})
+        """
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """answer every request of one keep-alive connection
+
+        Arguments:
+            reader {asyncio.StreamReader} -- incoming stream of the connection
+            writer {asyncio.StreamWriter} -- outgoing stream of the connection
+        """
+        try:
+            while True:
+                request = await self.__read_request(reader)
+                if request is None:
+                    break
+                method, target, headers = request
+                if method != 'GET':
+                    status, body, encoding = 405, json.dumps({'error': 'only GET is allowed'}).encode(), None
+                else:
+                    gzipped = 'gzip' in headers.get('accept-encoding', '')
+                    status, body, encoding = await self.respond(target, gzipped)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(self.__head(status, len(body), encoding, keep_alive) + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, target: str, gzipped: bool = False) -> Tuple[int, bytes, Optional[str]]:
+        """get the encoded response of request target from cache or compute it in thread pool
+
+        Arguments:
+            target {str} -- path and query string eg. /year_mode?city=Tokyo&year=2000
+
+        Keyword Arguments:
+            gzipped {bool} -- whether client accept gzip body (default: {False})
+
+        Returns:
+            Tuple[int, bytes, Optional[str]] -- status, body and its content encoding
+        """
+        url = urlsplit(target)
+        params = dict(parse_qsl(url.query))
+        key = (url.path, tuple(sorted(params.items())), gzipped)
+        response = self.__responses.get(key)
+        if response is None:
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, self.__compute, url.path, params, gzipped)
+            if response[0] == 200:
+                self.__responses.put(key, response)
+        return response
+
+    def __compute(self, path: str, params: Dict[str, str], gzipped: bool) -> Tuple[int, bytes, Optional[str]]:
+        """run the query of the path and encode its result
+
+        Arguments:
+            path {str} -- path of the endpoint
+            params {Dict[str, str]} -- arguments from query string
+            gzipped {bool} -- whether body should be compressed
+
+        Returns:
+            Tuple[int, bytes, Optional[str]] -- status, body and its content encoding
+        """
+        route = self.__routes.get(path)
+        try:
+            if route is None:
+                status, payload = 404, {'error': f'{path} not found'}
+            else:
+                status, payload = 200, route(params)
+        except CityNotFoundError as error:
+            status, payload = 404, {'error': str(error), 'type': 'CityNotFoundError'}
+        except (KeyError, TypeError, ValueError) as error:
+            status, payload = 400, {'error': str(error), 'type': 'ValueError'}
+        body = json.dumps(payload).encode()
+        if gzipped:
+            return status, gzip.compress(body, compresslevel=5), 'gzip'
+        return status, body, None
+
+    @staticmethod
+    async def __read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str]]]:
+        """read request line and headers, request body is ignored because every endpoint is GET
+
+        Arguments:
+            reader {asyncio.StreamReader} -- incoming stream of the connection
+
+        Returns:
+            Optional[Tuple[str, str, Dict[str, str]]] -- method, target and lower case headers
+                                                         None if client closed the connection
+        """
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+        headers = {}
+        for _ in range(MAX_HEADERS):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return method, target, headers
+
+    @staticmethod
+    def __head(status: int, length: int, encoding: Optional[str], keep_alive: bool) -> bytes:
+        """build status line and headers of the response
+
+        Arguments:
+            status {int} -- http status code
+            length {int} -- length of the body
+            encoding {Optional[str]} -- content encoding of the body or None
+            keep_alive {bool} -- whether the connection stay open
+
+        Returns:
+            bytes -- encoded head that end with blank line
+        """
+        lines = [f'HTTP/1.1 {status} {REASONS[status]}', 'Content-Type: application/json',
+                 f'Content-Length: {length}', f'Connection: {"keep-alive" if keep_alive else "close"}']
+        if encoding is not None:
+            lines.append(f'Content-Encoding: {encoding}')
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    @staticmethod
+    def __year_month(params: Dict[str, str]) -> Tuple[Optional[int], Optional[int]]:
+        """get optional year and month from query string
+
+        Arguments:
+            params {Dict[str, str]} -- arguments from query string
+
+        Returns:
+            Tuple[Optional[int], Optional[int]] -- year and month, None if it isn't given
+        """
+        year = int(params['year']) if params.get('year') else None
+        month = int(params['month']) if params.get('month') else None
+        return year, month
+
+    def __city(self, params: Dict[str, str]) -> Dict:
+        """every city in data"""
+        return {'city': list(self.database.city)}
+
+    def __year(self, params: Dict[str, str]) -> Dict:
+        """every year in data"""
+        return {'year': list(self.database.year), 'partial': list(self.database.partial_years)}
+
+    def __overall_mode(self, params: Dict[str, str]) -> Dict:
+        """temperature of a city in every date"""
+        return encode_series(self.database.overall_mode(params['city']))
+
+    def __year_mode(self, params: Dict[str, str]) -> Dict:
+        """temperature of a city in a year"""
+        return encode_series(self.database.year_mode(params['city'], int(params['year'])))
+
+    def __month_mode(self, params: Dict[str, str]) -> Dict:
+        """temperature of a city in a month of a year"""
+        return encode_series(self.database.month_mode(params['city'], int(params['year']), params['month']))
+
+    def __anomaly_mode(self, params: Dict[str, str]) -> Dict:
+        """temperature minus climatology of overall, year or month mode"""
+        return encode_series(self.database.anomaly_mode(params['city'], *self.__year_month(params)))
+
+    def __describe(self, params: Dict[str, str]) -> Dict:
+        """description of overall, year or month mode"""
+        # precomputed statistics are the same as get_describe of the selected data
+        return encode_series(self.database.describe(params['city'], *self.__year_month(params)))
+
+    def __query_cities(self, params: Dict[str, str]) -> Dict:
+        """temperature and description of many city in one slice"""
+        cities = [city for city in params.get('cities', '').split(',') if city] or None
+        anomaly = params.get('anomaly', '') not in ('', '0', 'false')
+        data, described = self.database.query_cities(cities, *self.__year_month(params), anomaly=anomaly)
+        return {'columns': list(data.columns), 'dates': encode_dates(data.index),
+                'values': [encode_values(data[column].to_numpy()) for column in data.columns],
+                'statistics': list(described.columns),
+                'describe': [encode_values(described.loc[city].to_numpy()) for city in data.columns]}
+
+    def __heatmap(self, params: Dict[str, str]) -> Dict:
+        """every city of a year or of the day of year climatology"""
+        year, _ = self.__year_month(params)
+        data = self.database.heatmap(year, params.get('anomaly', '') not in ('', '0', 'false'))
+        payload = {'index': list(data.index), 'values': [encode_values(row) for row in data.to_numpy()]}
+        if isinstance(data.columns, pd.DatetimeIndex):
+            payload['dates'] = encode_dates(data.columns)
+        else:
+            payload['days'] = list(map(int, data.columns))
+        return payload
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """parse the command line arguments
+
+    Keyword Arguments:
+        argv {Optional[List[str]]} -- arguments, None for sys.argv (default: {None})
+
+    Returns:
+        argparse.Namespace -- parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Serve Japan temperature queries over HTTP/JSON')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--source', default=FILEPATH, help='url or path of the csv file')
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--storage', choices=JapanTemperature.STORAGES, default='pandas')
+    parser.add_argument('--memory-budget', type=int, metavar='MB',
+                        help='read csv file larger than memory into memmap storage within MB of memory')
+    parser.add_argument('--dtype', choices=JapanTemperature.DTYPES, default='float64',
+                        help='keep the temperature as float32 or int16 tenths of degree in pandas storage')
+    parser.add_argument('--max-responses', type=int, default=1024,
+                        help='number of encoded response kept in cache')
+    options = parser.parse_args(argv)
+    if options.memory_budget is not None:
+        options.memory_budget <<= 20
+    return options
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """read the dataset then serve it until interrupted
+
+    Keyword Arguments:
+        argv {Optional[List[str]]} -- arguments, None for sys.argv (default: {None})
+    """
+    options = parse_args(argv)
+    database = JapanTemperature(storage=options.storage, memory_budget=options.memory_budget,
+                                dtype=options.dtype)
+    database._readfile(options.source, cache_dir=options.cache_dir)
+    server = QueryServer(database, options.max_responses)
+    print(f'serving {len(database.city)} cities on http://{options.host}:{options.port}'
+          f' using {database.memory_usage()["total"] >> 20} MB')
+    try:
+        asyncio.run(server.serve(options.host, options.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+"""
+This module contains the memory-mapped storage of the temperature data.
+The data is kept as one contiguous city x day float32 matrix so every process
+that open the same file share the same pages of memory.
+It also contains the int16 encoding that keep the temperature as tenths of a degree.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from datacache import CACHE_VERSION
+
+STORE_DTYPE = np.float32
+EPOCH = np.datetime64('1970-01-01', 'D')
+# bytes of memory that one value of a block take while it is gathered and transposed
+TRANSPOSE_BYTES = 2 * np.dtype(STORE_DTYPE).itemsize
+# bytes of a block of cities that is copied at once into the new version of the store
+COPY_BYTES = 64 << 20
+# int16 encoding, temperature is a number of tenth of a degree and the smallest int16 is NaN
+TENTHS = 10
+TENTHS_MISSING = np.iinfo(np.int16).min
+
+
+def encode_tenths(values: np.ndarray) -> np.ndarray:
+    """round the temperature to tenths of a degree and keep it as int16
+
+    Arguments:
+        values {np.ndarray} -- temperature in degree, NaN for missing value
+
+    Raises:
+        ValueError: Raises if a temperature is too large for int16 tenths
+
+    Returns:
+        np.ndarray -- int16 array of the same shape, TENTHS_MISSING for missing value
+    """
+    scaled = np.round(np.asarray(values, dtype=np.float64) * TENTHS)
+    missing = np.isnan(scaled)
+    limit = np.iinfo(np.int16).max
+    if np.any(np.abs(scaled[~missing]) > limit):
+        raise ValueError(f'temperature must be between -{limit / TENTHS} and {limit / TENTHS} for int16 dtype')
+    scaled[missing] = TENTHS_MISSING
+    return scaled.astype(np.int16)
+
+
+def decode_tenths(codes: np.ndarray) -> np.ndarray:
+    """convert int16 tenths back into temperature,
+    the value is the same float64 as parsing the temperature that has one decimal
+
+    Arguments:
+        codes {np.ndarray} -- int16 array from encode_tenths
+
+    Returns:
+        np.ndarray -- float64 temperature in degree, NaN for missing value
+    """
+    return np.where(codes == TENTHS_MISSING, np.nan, codes / TENTHS)
+
+
+def store_prefix(cache_file: str, fingerprint: str) -> str:
+    """get the path prefix of the store that belong to this version of data
+
+    Arguments:
+        cache_file {str} -- path of the cache file of the source
+        fingerprint {str} -- fingerprint of the source
+
+    Returns:
+        str -- prefix of the matrix and axis files
+    """
+    version = hashlib.sha1(f'{CACHE_VERSION}:{fingerprint}'.encode()).hexdigest()[:16]
+    return f'{os.path.splitext(cache_file)[0]}-{version}'
+
+
+def store_frame(matrix: np.ndarray, days: np.ndarray, cities: list) -> pd.DataFrame:
+    """wrap the city x day matrix into DataFrame without copying it
+
+    Arguments:
+        matrix {np.ndarray} -- city x day matrix of temperature
+        days {np.ndarray} -- day number since 1970-01-01 of each column of matrix
+        cities {list} -- city of each row of matrix
+
+    Returns:
+        pd.DataFrame -- DataFrame indexed by date that is a view of matrix
+    """
+    index = pd.DatetimeIndex((EPOCH + days).astype('datetime64[ns]'), name='Date')
+    # transpose of C-contiguous city x day is exactly pandas block layout
+    return pd.DataFrame(matrix.T, index=index, columns=pd.Index(cities), copy=False)
+
+
+def open_store(prefix: str) -> Optional[pd.DataFrame]:
+    """open the store read only
+
+    Arguments:
+        prefix {str} -- prefix of the matrix and axis files
+
+    Returns:
+        Optional[pd.DataFrame] -- DataFrame backed by memory map or None if store is missing
+    """
+    try:
+        with open(f'{prefix}.json') as file:
+            axis = json.load(file)
+        days = np.load(f'{prefix}.days.npy')
+        matrix = np.memmap(f'{prefix}.f32', dtype=STORE_DTYPE, mode='r',
+                           shape=(len(axis['cities']), len(days)))
+    except (OSError, ValueError, KeyError):
+        return None
+    return store_frame(matrix, days, axis['cities'])
+
+
+def write_store(prefix: str, temp: pd.DataFrame) -> pd.DataFrame:
+    """write the cleaned DataFrame into the store then open it
+
+    Arguments:
+        prefix {str} -- prefix of the matrix and axis files
+        temp {pd.DataFrame} -- cleaned DataFrame
+
+    Returns:
+        pd.DataFrame -- DataFrame backed by memory map
+    """
+    os.makedirs(os.path.dirname(prefix), exist_ok=True)
+    days = (temp.index.values.astype('datetime64[D]') - EPOCH).astype(np.int32)
+    tmp = f'.{os.getpid()}.tmp'
+
+    matrix = np.memmap(f'{prefix}.f32{tmp}', dtype=STORE_DTYPE, mode='w+',
+                       shape=(len(temp.columns), len(days)))
+    matrix[:] = temp.to_numpy(dtype=STORE_DTYPE).T
+    matrix.flush()
+    del matrix
+    return _commit(prefix, days, list(temp.columns), tmp)
+
+
+def write_chunks(prefix: str, chunks: Iterable[pd.DataFrame], budget: int) -> pd.DataFrame:
+    """clean the chunks of raw csv file straight into the store without keeping them in memory,
+    rows are spilled to a day x city file first because the number of day isn't known
+    until the last chunk then they are transposed into the store block by block
+
+    Arguments:
+        prefix {str} -- prefix of the matrix and axis files
+        chunks {Iterable[pd.DataFrame]} -- chunks indexed by date with the same columns
+        budget {int} -- bytes of memory that a block may take while it is transposed
+
+    Returns:
+        pd.DataFrame -- DataFrame backed by memory map with the same rows and cities as
+                        cleaning the whole file at once (sorted by date, city with missing value dropped)
+    """
+    os.makedirs(os.path.dirname(prefix), exist_ok=True)
+    tmp = f'.{os.getpid()}.tmp'
+    spill = f'{prefix}.rows{tmp}'
+    columns, parts, missing = [], [], None
+    try:
+        with open(spill, 'wb') as file:
+            for chunk in chunks:
+                if missing is None:
+                    columns = list(chunk.columns)
+                    missing = np.zeros(len(columns), dtype=bool)
+                missing |= chunk.isna().to_numpy().any(axis=0)
+                parts.append((chunk.index.values.astype('datetime64[D]') - EPOCH).astype(np.int32))
+                file.write(np.ascontiguousarray(chunk.to_numpy(dtype=STORE_DTYPE)).tobytes())
+        days = np.concatenate(parts) if parts else np.array([], dtype=np.int32)
+        # the same order as sort_index of both axes then dropna of the columns
+        order = None if np.all(days[:-1] <= days[1:]) else np.argsort(days, kind='stable')
+        keep = sorted((column, i) for i, column in enumerate(columns) if not missing[i])
+        cities = [column for column, _ in keep]
+        positions = np.array([i for _, i in keep], dtype=np.int64)
+
+        if len(days) and len(cities):
+            rows = np.memmap(spill, dtype=STORE_DTYPE, mode='r', shape=(len(days), len(columns)))
+            matrix = np.memmap(f'{prefix}.f32{tmp}', dtype=STORE_DTYPE, mode='w+',
+                               shape=(len(cities), len(days)))
+            step = max(budget // (len(columns) * TRANSPOSE_BYTES), 1)
+            for start in range(0, len(days), step):
+                stop = min(start + step, len(days))
+                block = rows[start:stop] if order is None else rows[order[start:stop]]
+                matrix[:, start:stop] = block[:, positions].T
+            matrix.flush()
+            del matrix, rows
+        else:
+            # memmap can't map empty file
+            open(f'{prefix}.f32{tmp}', 'wb').close()
+        if order is not None:
+            days = days[order]
+    finally:
+        if os.path.exists(spill):
+            os.remove(spill)
+    return _commit(prefix, days, cities, tmp)
+
+
+def extend_store(prefix: str, temp: pd.DataFrame, new: pd.DataFrame, budget: int = COPY_BYTES) -> pd.DataFrame:
+    """write a new version of the store that has the rows of new after the days of temp,
+    every city is a contiguous row of the matrix so the cities are copied block by block
+    from the current version and the new days are put at the end of each of them
+
+    Arguments:
+        prefix {str} -- prefix of the new version
+        temp {pd.DataFrame} -- DataFrame backed by memory map of the current version
+        new {pd.DataFrame} -- rows after the last day of temp with the same columns
+
+    Keyword Arguments:
+        budget {int} -- bytes of memory that a block may take while it is copied (default: {COPY_BYTES})
+
+    Returns:
+        pd.DataFrame -- DataFrame backed by memory map of the new version
+    """
+    os.makedirs(os.path.dirname(prefix), exist_ok=True)
+    tmp = f'.{os.getpid()}.tmp'
+    days = np.concatenate([(index.values.astype('datetime64[D]') - EPOCH).astype(np.int32)
+                           for index in (temp.index, new.index)])
+    # city x day view of the current version and of the new rows
+    old = temp.to_numpy().T
+    rows = new.to_numpy(dtype=STORE_DTYPE).T
+    if len(temp.columns):
+        matrix = np.memmap(f'{prefix}.f32{tmp}', dtype=STORE_DTYPE, mode='w+',
+                           shape=(len(temp.columns), len(days)))
+        step = max(budget // (len(days) * TRANSPOSE_BYTES), 1)
+        for first in range(0, len(matrix), step):
+            last = first + step
+            matrix[first:last, :old.shape[1]] = old[first:last]
+            matrix[first:last, old.shape[1]:] = rows[first:last]
+        matrix.flush()
+        del matrix
+    else:
+        # memmap can't map empty file
+        open(f'{prefix}.f32{tmp}', 'wb').close()
+    return _commit(prefix, days, list(temp.columns), tmp)
+
+
+def remove_store(prefix: str) -> None:
+    """remove every file of the store, process that already mapped it keep its pages until it close them
+
+    Arguments:
+        prefix {str} -- prefix of the matrix and axis files
+    """
+    for suffix in ('.json', '.days.npy', '.f32', '.cube.npz'):
+        try:
+            os.remove(f'{prefix}{suffix}')
+        except OSError:
+            # file is missing or still mapped on platform that can't remove it
+            pass
+
+
+def _commit(prefix: str, days: np.ndarray, cities: list, tmp: str) -> pd.DataFrame:
+    """write the axes beside the matrix that already written then make the store visible
+
+    Arguments:
+        prefix {str} -- prefix of the matrix and axis files
+        days {np.ndarray} -- day number since 1970-01-01 of each column of matrix
+        cities {list} -- city of each row of matrix
+        tmp {str} -- suffix of the files that aren't renamed yet
+
+    Returns:
+        pd.DataFrame -- DataFrame backed by memory map
+    """
+    with open(f'{prefix}.days.npy{tmp}', 'wb') as file:
+        np.save(file, days)
+    with open(f'{prefix}.json{tmp}', 'w') as file:
+        json.dump({'cities': cities}, file)
+
+    # json is renamed last, open_store can't see the store until it is complete
+    for suffix in ('.f32', '.days.npy', '.json'):
+        os.replace(f'{prefix}{suffix}{tmp}', f'{prefix}{suffix}')
+    return open_store(prefix)
+
+
+def read_cube(prefix: str) -> Optional[Dict[str, np.ndarray]]:
+    """read the precomputed statistics that were written beside the store
+
+    Arguments:
+        prefix {str} -- prefix of the matrix and axis files
+
+    Returns:
+        Optional[Dict[str, np.ndarray]] -- 'overall', 'year', 'month' and 'climate' array
+                                           or None if they weren't written
+    """
+    try:
+        with np.load(f'{prefix}.cube.npz', allow_pickle=False) as npz:
+            return {kind: npz[kind] for kind in ('overall', 'year', 'month', 'climate')}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def write_cube(prefix: str, cube: Dict[str, np.ndarray]) -> None:
+    """write the precomputed statistics beside the store so next read doesn't compute them
+
+    Arguments:
+        prefix {str} -- prefix of the matrix and axis files
+        cube {Dict[str, np.ndarray]} -- 'overall', 'year', 'month' and 'climate' array
+    """
+    tmp = f'{prefix}.cube.{os.getpid()}.tmp'
+    try:
+        with open(tmp, 'wb') as file:
+            np.savez(file, **cube)
+        os.replace(tmp, f'{prefix}.cube.npz')
+    except OSError:
+        # statistics can be computed again, reading can go on without them
+        pass
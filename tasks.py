@@ -0,0 +1,154 @@
+"""
+This module contains the persistent workers that run the long task of UI off the Tk thread.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class Task:
+    """
+    A function submitted to TaskRunner that can be cancelled
+    """
+
+    def __init__(self, name: str, func: Callable[[], Any]) -> None:
+        """Initialize the task
+
+        Arguments:
+            name {str} -- kind of the task, task of the same kind run one by one
+            func {Callable[[], Any]} -- function to be run in worker
+        """
+        self.name = name
+        self.func = func
+        self.future: Optional[Future] = None
+        self.__cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """
+        cancel the task, it is dropped if it hasn't started
+        else the running function should check cancelled and stop early
+        """
+        self.__cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        """whether the task was cancelled
+
+        Returns:
+            bool -- True if it was cancelled else False
+        """
+        return self.__cancelled.is_set()
+
+
+class TaskRunner:
+    """
+    Keep one persistent worker thread for each kind of task
+    and put every finished task into a completion queue for the Tk loop to drain
+    """
+
+    def __init__(self, notify: Callable[[], None]) -> None:
+        """Initialize the runner
+
+        Arguments:
+            notify {Callable[[], None]} -- called after a task is put into completion queue
+        """
+        self.__notify = notify
+        self.__executors: Dict[str, ThreadPoolExecutor] = {}
+        self.__latest: Dict[str, Task] = {}
+        self.__done: 'queue.Queue[Tuple[Task, Future]]' = queue.Queue()
+        self.__local = threading.local()
+
+    def submit(self, name: str, func: Callable[[], Any], supersede: bool = False) -> Task:
+        """run the function in the worker of its kind
+
+        Arguments:
+            name {str} -- kind of the task
+            func {Callable[[], Any]} -- function to be run, what it return is the result of the future
+
+        Keyword Arguments:
+            supersede {bool} -- cancel the previous task of the same kind (default: {False})
+
+        Returns:
+            Task -- the submitted task
+        """
+        if supersede and name in self.__latest:
+            self.__latest[name].cancel()
+        if name not in self.__executors:
+            self.__executors[name] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=name)
+        task = Task(name, func)
+        self.__latest[name] = task
+        task.future = self.__executors[name].submit(self.__run, task)
+        task.future.add_done_callback(lambda future: self.__finish(task, future))
+        return task
+
+    def __run(self, task: Task) -> Any:
+        """run the task in worker thread if it wasn't cancelled while waiting
+
+        Arguments:
+            task {Task} -- task to be run
+
+        Returns:
+            Any -- result of the function, None if it was cancelled
+        """
+        if task.cancelled:
+            return None
+        self.__local.task = task
+        try:
+            return task.func()
+        finally:
+            self.__local.task = None
+
+    def __finish(self, task: Task, future: Future) -> None:
+        """put the finished task into completion queue
+
+        Arguments:
+            task {Task} -- the finished task
+            future {Future} -- future of the task
+        """
+        self.__done.put((task, future))
+        self.__notify()
+
+    def cancel(self, name: str) -> None:
+        """cancel the latest task of the kind so it stops early and its result is dropped
+
+        Arguments:
+            name {str} -- kind of the task
+        """
+        if name in self.__latest:
+            self.__latest[name].cancel()
+
+    def cancelled(self) -> bool:
+        """whether the task that running in the current worker was cancelled
+
+        Returns:
+            bool -- True if it was cancelled else False
+        """
+        task = getattr(self.__local, 'task', None)
+        return task is not None and task.cancelled
+
+    def drain(self) -> List[Tuple[Task, Future]]:
+        """take every finished task out of completion queue
+
+        Returns:
+            List[Tuple[Task, Future]] -- finished task and its future
+        """
+        finished = []
+        while True:
+            try:
+                finished.append(self.__done.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def shutdown(self) -> None:
+        """
+        cancel every task that is waiting then stop the workers
+        """
+        for task in self.__latest.values():
+            task.cancel()
+        for executor in self.__executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,208 @@
+"""
+This module contains the timing spans of the hot path of the application.
+Tracing is enabled by JAPANTEMP_TRACE environment variable, its value can be a path
+ending with .json (Chrome trace) or .jsonl (JSON lines) to export the spans on exit.
+When it is disabled span() return the same no-op object so it cost almost nothing.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+TRACE_ENV = 'JAPANTEMP_TRACE'
+MAX_SPANS = 100000
+
+
+class _NullSpan:
+    """
+    Span that does nothing, it is returned when tracing is disabled
+    """
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    """
+    Span that record its duration into tracer when it is exited
+    """
+
+    def __init__(self, tracer: 'Tracer', name: str, args: Dict[str, Any]) -> None:
+        self.__tracer = tracer
+        self.__name = name
+        self.__args = args
+        self.__start = 0
+
+    def __enter__(self) -> '_Span':
+        self.__tracer._push(self.__name)
+        self.__start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        end = time.perf_counter_ns()
+        self.__tracer._pop(self.__name, self.__start, end, self.__args)
+
+
+class Tracer:
+    """
+    Collect timing spans from every thread and export them
+    """
+
+    def __init__(self, enabled: bool = False, path: Optional[str] = None) -> None:
+        """Initialize the tracer
+
+        Keyword Arguments:
+            enabled {bool} -- whether span is recorded (default: {False})
+            path {Optional[str]} -- file that spans are exported into by export() (default: {None})
+        """
+        self.enabled = enabled
+        self.path = path
+        self.__spans: deque = deque(maxlen=MAX_SPANS)
+        self.__last_task: List[Dict[str, Any]] = []
+        # spans of the last action of every task name so a later span can continue it
+        self.__actions: Dict[str, List[Dict[str, Any]]] = {}
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+
+    def span(self, name: str, **args: Any):
+        """time the block of with statement
+
+        Arguments:
+            name {str} -- name of the stage eg. read, slice, describe, artists, draw
+
+        outermost span that has task argument continue the last action of that name
+        eg. render on the Tk thread is added to plotting that ran on the worker
+
+        Returns:
+            context manager that record the span
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def _push(self, name: str) -> None:
+        """remember the span that is opened in this thread
+
+        Arguments:
+            name {str} -- name of the span
+        """
+        stack = getattr(self.__local, 'stack', None)
+        if stack is None:
+            stack = self.__local.stack = []
+            self.__local.children = []
+        stack.append(name)
+
+    def _pop(self, name: str, start: int, end: int, args: Dict[str, Any]) -> None:
+        """record the span that is closed in this thread
+
+        Arguments:
+            name {str} -- name of the span
+            start {int} -- perf_counter_ns when span was opened
+            end {int} -- perf_counter_ns when span was closed
+            args {Dict[str, Any]} -- extra information of the span
+        """
+        stack = self.__local.stack
+        stack.pop()
+        thread = threading.current_thread()
+        record = {'name': name, 'start': start, 'duration': end - start, 'thread': thread.name,
+                  'thread_id': thread.ident, 'depth': len(stack), 'args': args}
+        with self.__lock:
+            self.__spans.append(record)
+            self.__local.children.append(record)
+            # the outermost span is one user action
+            if not stack:
+                action = self.__local.children
+                self.__local.children = []
+                task = args.get('task', name)
+                if 'task' in args and task in self.__actions:
+                    action = self.__actions[task] + action
+                self.__actions[task] = action
+                self.__last_task = action
+
+    def summary(self) -> str:
+        """summarize the last finished user action for the status bar,
+        the total is the sum of every outermost span of the action (worker and Tk thread)
+
+        Returns:
+            str -- total and every stage in millisecond eg. 'plotting 85.0ms | slice 2.1 draw 70.2'
+        """
+        with self.__lock:
+            spans = list(self.__last_task)
+        if not spans:
+            return ''
+        roots = [span for span in spans if span['depth'] == 0]
+        total = sum(span['duration'] for span in roots)
+        stages = ' '.join(f'{span["name"]} {span["duration"] / 1e6:.1f}'
+                          for span in spans if span['depth'] == 1)
+        return f'{roots[0]["name"]} {total / 1e6:.1f}ms | {stages}'
+
+    def records(self) -> List[Dict[str, Any]]:
+        """get every recorded span
+
+        Returns:
+            List[Dict[str, Any]] -- name, start, duration (nanosecond), thread, depth and args of each span
+        """
+        with self.__lock:
+            return list(self.__spans)
+
+    def export_chrome(self, path: str) -> None:
+        """write spans in Chrome trace format that can be opened in chrome://tracing or Perfetto
+
+        Arguments:
+            path {str} -- path of the json file
+        """
+        spans = self.records()
+        pid = os.getpid()
+        events = [{'name': span['name'], 'ph': 'X', 'ts': span['start'] / 1e3,
+                   'dur': span['duration'] / 1e3, 'pid': pid, 'tid': span['thread_id'],
+                   'args': span['args']} for span in spans]
+        # metadata event so viewer show name of the thread instead of its id
+        threads = {span['thread_id']: span['thread'] for span in spans}
+        events.extend({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+                       'args': {'name': name}} for tid, name in threads.items())
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events}, file)
+
+    def export_jsonl(self, path: str) -> None:
+        """write one span per line in json
+
+        Arguments:
+            path {str} -- path of the jsonl file
+        """
+        with open(path, 'w') as file:
+            for span in self.records():
+                file.write(json.dumps(span) + '\n')
+
+    def export(self) -> None:
+        """
+        write spans into path of the tracer, its extension choose the format
+        """
+        if not self.enabled or not self.path:
+            return
+        if self.path.endswith('.jsonl'):
+            self.export_jsonl(self.path)
+        else:
+            self.export_chrome(self.path)
+
+
+def _from_environment() -> Tracer:
+    """create tracer from JAPANTEMP_TRACE environment variable
+
+    Returns:
+        Tracer -- enabled tracer if the variable is set else disabled one
+    """
+    value = os.environ.get(TRACE_ENV, '')
+    path = value if value.endswith(('.json', '.jsonl')) else None
+    return Tracer(enabled=bool(value) and value != '0', path=path)
+
+
+tracer = _from_environment()